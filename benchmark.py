@@ -0,0 +1,164 @@
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+
+from maps import MAPS, make_world, map_endpoints, spawn_dynamic_obstacle, spawn_moving_obstacle
+from planner import ALGORITHMS, BATCH_ALGORITHMS, plan
+from profiling import PlannerProfiler
+from world import point_in_obstacle
+
+# Headless benchmark: every algorithm on every map over a range of seeds, with
+# per-run records written as JSON for tracking regressions.
+#
+#   python benchmark.py --seeds 20 --output results.json
+#
+# Seeds drive both the dynamic obstacle layout and the planner, so a (map, algorithm,
+# seed) triple always describes the same run.
+
+
+# Build the world for one run, with dynamic and moving obstacles spawned from the run's seed
+def benchmark_world(map_name, seed, dynamic_obstacles, cache_size=0, moving_obstacles=0):
+    world = make_world(map_name, cache_size=cache_size)
+    start, goal = map_endpoints(map_name)
+    rng = random.Random(seed)
+    attempts = 0
+    while len(world.dynamic_obstacles) < dynamic_obstacles and attempts < 100 * dynamic_obstacles:
+        obstacle = spawn_dynamic_obstacle(world, rng)
+        # Never block the endpoints, or the run would measure nothing
+        if obstacle and (world.in_obstacle(start) or world.in_obstacle(goal)):
+            world.remove_dynamic_obstacle(obstacle)
+        attempts += 1
+    attempts = 0
+    while len(world.moving_obstacles) < moving_obstacles and attempts < 100 * moving_obstacles:
+        obstacle = spawn_moving_obstacle(world, rng)
+        # Nor start out on the robot
+        if obstacle and point_in_obstacle(start, obstacle.shape, world.clearance):
+            world.remove_moving_obstacle(obstacle)
+        attempts += 1
+    return world
+
+
+def run_once(map_name, algorithm, seed, budget, time_limit, dynamic_obstacles, batch_size, anytime=False,
+             goal_bias=0.0, informed=False, cache_size=0, moving_obstacles=0, profiler=None):
+    world = benchmark_world(map_name, seed, dynamic_obstacles, cache_size, moving_obstacles)
+    start, goal = map_endpoints(map_name)
+    if algorithm not in BATCH_ALGORITHMS:
+        batch_size = None
+    result = plan(world, start, goal, budget=budget, algorithm=algorithm, seed=seed, time_limit=time_limit,
+                  batch_size=batch_size, anytime=anytime, goal_bias=goal_bias, informed=informed,
+                  profiler=profiler)
+    return {
+        "map": map_name,
+        "algorithm": algorithm,
+        "seed": seed,
+        "success": result.success,
+        "elapsed": result.elapsed,
+        "iterations": result.iterations,
+        "restarts": result.restarts,
+        "tree_nodes": result.nodes.node_count(),
+        "path_nodes": len(result.path),
+        # JSON has no infinity; failed runs have no cost
+        "cost": result.cost if math.isfinite(result.cost) else None,
+        # (elapsed, cost) of each improvement in anytime runs
+        "history": result.history,
+        "collision_cache": world.cache.stats() if world.cache is not None else None,
+    }
+
+
+# Aggregate the runs of one (map, algorithm) pair
+def summarize(runs):
+    successes = [run for run in runs if run["success"]]
+    elapsed = [run["elapsed"] for run in runs]
+    return {
+        "map": runs[0]["map"],
+        "algorithm": runs[0]["algorithm"],
+        "runs": len(runs),
+        "success_rate": len(successes) / len(runs),
+        "median_elapsed": statistics.median(elapsed),
+        "mean_elapsed": statistics.mean(elapsed),
+        "mean_iterations": statistics.mean(run["iterations"] for run in runs),
+        "mean_tree_nodes": statistics.mean(run["tree_nodes"] for run in runs),
+        "mean_cost": statistics.mean(run["cost"] for run in successes) if successes else None,
+    }
+
+
+def print_table(summaries, file=sys.stdout):
+    header = "%-6s %-26s %5s %8s %10s %10s %10s %9s" % (
+        "map", "algorithm", "runs", "success", "median ms", "iters", "tree", "cost")
+    print(header, file=file)
+    print("-" * len(header), file=file)
+    for row in summaries:
+        cost = "-" if row["mean_cost"] is None else "%.1f" % row["mean_cost"]
+        print("%-6s %-26s %5d %7.0f%% %10.1f %10.0f %10.0f %9s" % (
+            row["map"], row["algorithm"], row["runs"], 100 * row["success_rate"], 1000 * row["median_elapsed"],
+            row["mean_iterations"], row["mean_tree_nodes"], cost), file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the planners headless across maps and seeds.")
+    parser.add_argument("--maps", nargs="+", default=sorted(MAPS), choices=sorted(MAPS))
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    parser.add_argument("--seeds", type=int, default=10, help="number of seeds per map and algorithm")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--budget", type=int, default=10000, help="expansion budget per run")
+    parser.add_argument("--time-limit", type=float, default=None, help="wall-clock limit per run, in seconds")
+    parser.add_argument("--dynamic-obstacles", type=int, default=0,
+                        help="random dynamic obstacles placed before each run")
+    parser.add_argument("--moving-obstacles", type=int, default=0,
+                        help="random obstacles moving at constant velocity, placed before each run")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="use the batched expanders for the algorithms that have one")
+    parser.add_argument("--anytime", action="store_true",
+                        help="keep improving the path until the budget or time limit runs out")
+    parser.add_argument("--goal-bias", type=float, default=0.0, help="share of samples drawn at the goal")
+    parser.add_argument("--informed", action="store_true",
+                        help="sample the start-goal ellipse of the best path so far (with --anytime)")
+    parser.add_argument("--collision-cache", type=int, default=0, metavar="ENTRIES",
+                        help="memoize scalar collision checks in an LRU cache of this size")
+    parser.add_argument("--profile", action="store_true",
+                        help="report the time spent in each planning phase for every map and algorithm")
+    parser.add_argument("--output", help="write the runs and summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    runs = []
+    summaries = []
+    profiles = []
+    for map_name in args.maps:
+        for algorithm in args.algorithms:
+            # One profiler for all the seeds of a pair
+            profiler = PlannerProfiler() if args.profile else None
+            pair = [run_once(map_name, algorithm, seed, args.budget, args.time_limit, args.dynamic_obstacles,
+                             args.batch_size, args.anytime, args.goal_bias, args.informed,
+                             args.collision_cache, args.moving_obstacles, profiler)
+                    for seed in range(args.first_seed, args.first_seed + args.seeds)]
+            runs.extend(pair)
+            summaries.append(summarize(pair))
+            if profiler:
+                summaries[-1]["profile"] = profiler.stats()
+                profiles.append((map_name, algorithm, profiler))
+
+    print_table(summaries)
+    for map_name, algorithm, profiler in profiles:
+        print("\n%s %s" % (map_name, algorithm))
+        print(profiler.report())
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": vars(args),
+            "summary": summaries,
+            "runs": runs,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return summaries
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+
+# Entries kept before the least recently used are evicted
+CACHE_CAPACITY = 1 << 16
+# Endpoints are rounded to this many map units for the keys, so the same node points
+# reached through float arithmetic twice still share an entry
+CACHE_QUANTUM = 1e-3
+# Obstacle changes remembered for revalidation; entries older than that are dropped
+MAX_CHANGES = 256
+
+
+# Bounded LRU memo of collision results for points and segments.
+#
+# Every entry records the obstacle version it was computed at and the box it depends
+# on. Adding or removing a dynamic obstacle bumps the version and logs the obstacle's
+# bounds, but touches no entries: a lookup replays the changes made since the entry
+# was stored and only throws it away if one of them overlaps its box and could flip
+# the result (a new obstacle can only block, a removed one can only free).
+class CollisionCache:
+    def __init__(self, capacity=CACHE_CAPACITY, quantum=CACHE_QUANTUM):
+        self.capacity = capacity
+        self.quantum = quantum
+        self.entries = OrderedDict()
+        self.version = 0
+        # changes[i] = (bounds, added) took the obstacles from version first + i to first + i + 1
+        self.changes = []
+        self.first = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def point_key(self, kind, point, clearance=0):
+        q = self.quantum
+        return kind, round(point[0] / q), round(point[1] / q), clearance
+
+    # Segments are undirected, so both orders share a key
+    def segment_key(self, kind, point1, point2):
+        q = self.quantum
+        end1 = (round(point1[0] / q), round(point1[1] / q))
+        end2 = (round(point2[0] / q), round(point2[1] / q))
+        return (kind,) + (end1 + end2 if end1 <= end2 else end2 + end1)
+
+    # Cached result for key, or None on a miss
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        result, version, box = entry
+        if version != self.version and not self.revalidate(result, version, box):
+            del self.entries[key]
+            self.invalidations += 1
+            self.misses += 1
+            return None
+        entry[1] = self.version
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    # box is (x0, y0, x1, y1), everything an obstacle must overlap to change the result
+    def put(self, key, result, box):
+        self.entries[key] = [result, self.version, box]
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def revalidate(self, result, version, box):
+        if version < self.first:
+            return False
+        x0, y0, x1, y1 = box
+        for (bx0, by0, bx1, by1), added in self.changes[version - self.first:]:
+            if added == result:
+                # Blocked stays blocked when obstacles appear, free stays free when they go
+                continue
+            if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                return False
+        return True
+
+    # Record that an obstacle with these bounds was added (or removed)
+    def obstacle_changed(self, bounds, added):
+        self.changes.append((bounds, added))
+        self.version += 1
+        if len(self.changes) > MAX_CHANGES:
+            del self.changes[0]
+            self.first += 1
+
+    # Drop everything, e.g. when all dynamic obstacles go at once
+    def clear(self):
+        self.entries.clear()
+        self.version += 1
+        self.changes = []
+        self.first = self.version
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
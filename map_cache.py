@@ -0,0 +1,128 @@
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from occupancy import TILE_CELLS, dense_fits
+from world import STATIC_REACH, layer_grid
+
+# Compiled maps: the static distance field of a map is the one expensive part of building
+# a World, so it is computed once per distinct geometry and stored on disk together
+# with the obstacles packed as arrays (the fields of large maps as their tiles).
+# Artefacts are keyed by a hash of the geometry and memory-mapped read-only on load, so
+# repeated runs skip the stamping and every process using the same map (pool workers,
+# parallel benchmarks) shares its pages.
+#
+# Layout: MAGIC, an 8-byte little-endian header length, a JSON header naming each
+# array's dtype, shape and offset, then the raw arrays, each aligned to ALIGNMENT bytes
+# from the start of the file.
+
+MAGIC = b"MODRRTMAP\n"
+# Bump when the layout or the compiled contents change, so old artefacts stop matching
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+# Where artefacts go unless a caller says otherwise
+MAP_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache")),
+                             "mod-rrt-maps")
+
+
+def aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+# Content hash of everything the compiled arrays depend on
+def map_key(obstacles, width, height, resolution):
+    obstacles = [[obs[0]] + [float(value) for value in obs[1:]] for obs in obstacles]
+    content = json.dumps({"version": FORMAT_VERSION, "width": width, "height": height, "resolution": resolution,
+                          "dense": dense_fits(width, height, resolution), "tile": TILE_CELLS,
+                          "reach": STATIC_REACH, "obstacles": obstacles}, separators=(",", ":"))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+# Tagged obstacles as an (n, 4) array of rect x, y, w, h and an (m, 3) array of circle x, y, r
+def pack_obstacles(obstacles):
+    rects = np.array([obs[1:] for obs in obstacles if obs[0] == "rect"], dtype=float).reshape(-1, 4)
+    circles = np.array([obs[1:] for obs in obstacles if obs[0] == "circle"], dtype=float).reshape(-1, 3)
+    return rects, circles
+
+
+# The arrays of a map's static layer as World would build it; occupancy.unpack_field
+# turns them back into the field
+def compile_map(obstacles, width, height, resolution):
+    grid = layer_grid(width, height, resolution, math.inf)
+    for obs in obstacles:
+        grid.stamp(obs)
+    rects, circles = pack_obstacles(obstacles)
+    return dict(grid.pack(), rects=rects, circles=circles)
+
+
+# Write the arrays and header to path. The file appears under its name only once it is
+# complete, so concurrent writers and readers never see half of one.
+def write_artifact(path, arrays, header):
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout = {}
+    size = 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": size}
+        size = aligned(size + array.nbytes)
+    encoded = json.dumps(dict(header, version=FORMAT_VERSION, arrays=layout)).encode()
+    start = aligned(len(MAGIC) + 8 + len(encoded))
+    temporary = "%s.%d.tmp" % (path, os.getpid())
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.seek(start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(start + size)
+    os.replace(temporary, path)
+
+
+# Map an artefact read-only; returns (header, {name: array}). The arrays are views of
+# one shared mapping. Raises ValueError for files that are not artefacts of this version.
+def read_artifact(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s is not a compiled map" % path)
+        length = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(length))
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError("%s has format version %r, not %d" % (path, header.get("version"), FORMAT_VERSION))
+    start = aligned(len(MAGIC) + 8 + length)
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        offset = start + spec["offset"]
+        if offset + count * dtype.itemsize > len(data):
+            raise ValueError("%s is truncated" % path)
+        arrays[name] = data[offset:offset + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    return header, arrays
+
+
+# The compiled arrays for a map, from cache_dir when an artefact for this geometry is
+# there, else compiled and stored there first. Falls back to the in-memory arrays when
+# the directory is not writable.
+def load_compiled(obstacles, width, height, resolution, cache_dir=MAP_CACHE_DIR):
+    key = map_key(obstacles, width, height, resolution)
+    path = os.path.join(cache_dir, key + ".map")
+    rects, circles = pack_obstacles(obstacles)
+    try:
+        header, arrays = read_artifact(path)
+        # The key is a hash; make sure the geometry really is this map's
+        if np.array_equal(arrays["rects"], rects) and np.array_equal(arrays["circles"], circles):
+            return arrays
+    except (OSError, ValueError, KeyError):
+        pass
+    arrays = compile_map(obstacles, width, height, resolution)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_artifact(path, arrays, {"key": key, "width": width, "height": height, "resolution": resolution})
+        # Map the stored copy, so this process shares pages with the later ones
+        return read_artifact(path)[1]
+    except OSError:
+        return arrays
@@ -0,0 +1,108 @@
+import json
+import math
+import os
+import random
+
+from map_cache import MAP_CACHE_DIR, load_compiled
+from occupancy import unpack_field
+from world import HEIGHT, RESOLUTION, WIDTH, World, as_tagged
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# Fastest random moving obstacle, relative to the robot's speed
+MAX_OBSTACLE_SPEED = 0.5
+# The predefined maps, one file each
+MAP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "map_files")
+MAP_EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+# Read a map file: JSON, or YAML with PyYAML installed. The file holds "obstacles", a
+# list of tagged shapes (["rect", x, y, w, h] or ["circle", x, y, r]; bare [x, y, w, h]
+# are rects), "start" and "goal", and optionally "clearance", "width" and "height".
+# Raises ValueError for a file that does not parse or lacks any of these.
+def load_map_file(path):
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ImportError("reading %s needs PyYAML (pip install pyyaml)" % path)
+            try:
+                data = yaml.safe_load(f)
+            except yaml.YAMLError as error:
+                raise ValueError("%s is not valid YAML: %s" % (path, error))
+        else:
+            data = json.load(f)
+    try:
+        return {
+            "static_obstacles": [as_tagged(tuple(obs)) for obs in data["obstacles"]],
+            "start": tuple(data["start"]),
+            "goal": tuple(data["goal"]),
+            "clearance": data.get("clearance", 10),
+            "width": data.get("width", WIDTH),
+            "height": data.get("height", HEIGHT),
+        }
+    except (KeyError, TypeError, AttributeError) as error:
+        raise ValueError("malformed map file %s: %s: %s" % (path, type(error).__name__, error))
+
+
+# Obstacle and Map Settings, by file name without the extension
+MAPS = {os.path.splitext(name)[0]: load_map_file(os.path.join(MAP_DIR, name))
+        for name in sorted(os.listdir(MAP_DIR)) if name.endswith(MAP_EXTENSIONS)}
+
+
+# Build a World from map settings. Unless cache_dir is None, the static distance field
+# comes precompiled and memory-mapped from there (see map_cache.py).
+def build_world(settings, clearance=None, cache_size=0, cache_dir=MAP_CACHE_DIR):
+    if clearance is None:
+        clearance = settings["clearance"]
+    width, height = settings["width"], settings["height"]
+    static_field = None
+    if cache_dir is not None:
+        static_field = unpack_field(load_compiled(settings["static_obstacles"], width, height, RESOLUTION,
+                                                  cache_dir))
+    return World(settings["static_obstacles"], width, height, clearance=clearance, cache_size=cache_size,
+                 static_field=static_field)
+
+
+# Build a fresh World for one of the predefined maps
+def make_world(name, clearance=None, cache_size=0, cache_dir=MAP_CACHE_DIR):
+    return build_world(MAPS[name], clearance, cache_size, cache_dir)
+
+
+# Build a World from a map file
+def load_world(path, clearance=None, cache_size=0, cache_dir=MAP_CACHE_DIR):
+    return build_world(load_map_file(path), clearance, cache_size, cache_dir)
+
+
+def map_endpoints(name):
+    return MAPS[name]["start"], MAPS[name]["goal"]
+
+
+# Generate a random dynamic obstacle of one of the given shapes, at least 100 units
+# inside a width x height map
+def random_dynamic_obstacle(rng=random, shapes=("circle", "rect"), width=WIDTH, height=HEIGHT):
+    if rng.choice(shapes) == "circle":
+        return ("circle", rng.randint(100, width - 100), rng.randint(100, height - 100), rng.randint(20, 40))
+    return ("rect", rng.randint(100, width - 100), rng.randint(100, height - 100), rng.randint(20, 80),
+            rng.randint(20, 80))
+
+
+# Add a random dynamic obstacle unless it overlaps with an existing obstacle
+def spawn_dynamic_obstacle(world, rng=random, shapes=("circle", "rect")):
+    new_obstacle = random_dynamic_obstacle(rng, shapes, world.width, world.height)
+    if world.overlaps_obstacle(new_obstacle):
+        return None
+    return world.add_dynamic_obstacle(new_obstacle)
+
+
+# Add a random moving obstacle heading in a random direction at up to max_speed, unless
+# it starts out overlapping an existing obstacle
+def spawn_moving_obstacle(world, rng=random, shapes=("circle", "rect"), max_speed=MAX_OBSTACLE_SPEED):
+    shape = random_dynamic_obstacle(rng, shapes, world.width, world.height)
+    if world.overlaps_obstacle(shape):
+        return None
+    angle = rng.uniform(0, 2 * math.pi)
+    speed = rng.uniform(0, max_speed)
+    return world.add_moving_obstacle(shape, (speed * math.cos(angle), speed * math.sin(angle)))
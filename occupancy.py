@@ -0,0 +1,301 @@
+import math
+
+import numpy as np
+
+# Grids with more cells than this are stored in tiles rather than one dense array
+DENSE_CELL_LIMIT = 1 << 22
+# Cells along each side of a tile
+TILE_CELLS = 64
+
+
+# Signed distance from the cell centres of a grid window to one tagged obstacle.
+# xs and ys are the window's cell-centre coordinates; inside points are negative.
+def obstacle_distance_field(obs, xs, ys):
+    gx, gy = np.meshgrid(xs, ys)
+    if obs[0] == "circle":
+        _, cx, cy, r = obs
+        return np.hypot(gx - cx, gy - cy) - r
+    _, x, y, w, h = obs
+    qx = np.abs(gx - (x + w / 2)) - w / 2
+    qy = np.abs(gy - (y + h / 2)) - h / 2
+    outside = np.hypot(np.maximum(qx, 0), np.maximum(qy, 0))
+    inside = np.minimum(np.maximum(qx, qy), 0)
+    return outside + inside
+
+
+# Signed distance field over the map, sampled at cell centres.
+# Distances are clamped to max_distance, so stamping an obstacle only touches the
+# cells within max_distance of it. field can be a precompiled (rows, cols) float32
+# array to adopt instead of starting empty, such as a read-only memory map.
+class DistanceGrid:
+    def __init__(self, width, height, resolution=1.0, max_distance=math.inf, field=None):
+        self.init_geometry(width, height, resolution, max_distance)
+        if field is None:
+            field = np.full((self.rows, self.cols), max_distance, dtype=np.float32)
+        elif field.shape != (self.rows, self.cols) or field.dtype != np.float32:
+            raise ValueError("expected a %dx%d float32 field, got %s %s" % (self.rows, self.cols, field.shape,
+                                                                            field.dtype))
+        self.field = field
+
+    def init_geometry(self, width, height, resolution, max_distance):
+        self.width = width
+        self.height = height
+        self.resolution = resolution
+        self.max_distance = max_distance
+        # A point lies within this distance of the centre of its cell; the extra
+        # margin absorbs float32 rounding in the stored field
+        self.slack = resolution * math.sqrt(2) / 2 + 1e-3
+        self.cols, self.rows = grid_shape(width, height, resolution)
+
+    # Cell window (row0, row1, col0, col1) covering an axis-aligned box
+    def window(self, x0, y0, x1, y1):
+        res = self.resolution
+        col0 = max(int(math.floor(x0 / res)), 0)
+        row0 = max(int(math.floor(y0 / res)), 0)
+        col1 = min(int(math.ceil(x1 / res)) + 1, self.cols)
+        row1 = min(int(math.ceil(y1 / res)) + 1, self.rows)
+        return row0, row1, col0, col1
+
+    # Cell window an obstacle can influence
+    def obstacle_window(self, obs):
+        x0, y0, x1, y1 = obstacle_bounds(obs)
+        reach = self.max_distance if math.isfinite(self.max_distance) else max(self.width, self.height) * 2
+        return self.window(x0 - reach, y0 - reach, x1 + reach, y1 + reach)
+
+    def cell_centres(self, row0, row1, col0, col1):
+        res = self.resolution
+        xs = (np.arange(col0, col1) + 0.5) * res
+        ys = (np.arange(row0, row1) + 0.5) * res
+        return xs, ys
+
+    # Merge an obstacle into the field
+    def stamp(self, obs):
+        row0, row1, col0, col1 = self.obstacle_window(obs)
+        if row0 >= row1 or col0 >= col1:
+            return
+        xs, ys = self.cell_centres(row0, row1, col0, col1)
+        field = np.minimum(obstacle_distance_field(obs, xs, ys), self.max_distance)
+        view = self.field[row0:row1, col0:col1]
+        np.minimum(view, field, out=view)
+
+    # Recompute the window an obstacle influenced from the obstacles that remain
+    def erase(self, obs, remaining):
+        row0, row1, col0, col1 = self.obstacle_window(obs)
+        if row0 >= row1 or col0 >= col1:
+            return
+        xs, ys = self.cell_centres(row0, row1, col0, col1)
+        view = self.field[row0:row1, col0:col1]
+        view.fill(self.max_distance)
+        for other in remaining:
+            orow0, orow1, ocol0, ocol1 = self.obstacle_window(other)
+            if orow0 >= row1 or orow1 <= row0 or ocol0 >= col1 or ocol1 <= col0:
+                continue
+            np.minimum(view, obstacle_distance_field(other, xs, ys), out=view)
+        np.minimum(view, self.max_distance, out=view)
+
+    def clear(self):
+        self.field.fill(self.max_distance)
+
+    # The field as named arrays, for map_cache to store (see unpack_field)
+    def pack(self):
+        return {"field": self.field}
+
+    # Distances stored for the cells (rows[i], cols[i]), which must lie on the grid
+    def cell_distances(self, rows, cols):
+        return self.field[rows, cols]
+
+    # Look up the distance stored for the cell containing a point, or None off the grid
+    def lookup(self, point):
+        col = int(point[0] / self.resolution)
+        row = int(point[1] / self.resolution)
+        if point[0] < 0 or point[1] < 0 or row >= self.rows or col >= self.cols:
+            return None
+        return float(self.field[row, col])
+
+    # Answer "is the point within clearance of an obstacle?" from the grid alone.
+    # Returns None when the cell is too close to the clearance boundary (or the
+    # clamp) to decide, in which case the caller should do an exact check.
+    def blocked(self, point, clearance):
+        d = self.lookup(point)
+        if d is None:
+            return None
+        if d >= self.max_distance:
+            # Clamped: only known to be at least max_distance from any obstacle
+            return False if d - self.slack > clearance else None
+        if d - self.slack > clearance:
+            return False
+        if d + self.slack <= clearance:
+            return True
+        return None
+
+    # Vectorized blocked() for an (n, 2) array of points: 1 blocked, 0 free, -1 undecided
+    def blocked_many(self, points, clearance):
+        result = np.full(len(points), -1, dtype=np.int8)
+        cols = np.floor(points[:, 0] / self.resolution).astype(np.int64)
+        rows = np.floor(points[:, 1] / self.resolution).astype(np.int64)
+        inside = (cols >= 0) & (rows >= 0) & (cols < self.cols) & (rows < self.rows)
+        d = np.full(len(points), np.nan)
+        d[inside] = self.cell_distances(rows[inside], cols[inside])
+        clamped = d >= self.max_distance
+        result[d - self.slack > clearance] = 0
+        result[(d + self.slack <= clearance) & ~clamped] = 1
+        return result
+
+
+# DistanceGrid for maps too large for a dense array, in two levels. The coarse level has
+# one entry per square tile of TILE_CELLS cells: the tile's slot in a pool of fine
+# (TILE_CELLS, TILE_CELLS) arrays, or -1 when the whole tile has one value, kept in
+# the coarse values array instead (max_distance unless the tile lies deep inside an
+# obstacle). Fine tiles are only allocated where an obstacle boundary comes within
+# max_distance, which must be finite. Distances are also clamped from below at
+# -max_distance, which only moves cells that are blocked for any clearance anyway.
+# tiles takes the arrays of pack(), possibly read-only (memory-mapped); they are
+# copied before the first write.
+class TiledDistanceGrid(DistanceGrid):
+    def __init__(self, width, height, resolution=1.0, max_distance=32, tiles=None):
+        if not math.isfinite(max_distance):
+            raise ValueError("a tiled grid needs a finite max_distance")
+        self.init_geometry(width, height, resolution, max_distance)
+        self.tile_rows = -(-self.rows // TILE_CELLS)
+        self.tile_cols = -(-self.cols // TILE_CELLS)
+        if tiles is None:
+            self.clear()
+        else:
+            self.slots = tiles["tile_slots"]
+            self.values = tiles["tile_values"]
+            self.pool = tiles["tiles"]
+            self.used = len(self.pool)
+            self.free = []
+            if self.slots.shape != (self.tile_rows, self.tile_cols):
+                raise ValueError("expected %dx%d tiles, got %s" % (self.tile_rows, self.tile_cols, self.slots.shape))
+
+    # Split a cell window into its parts on each tile: (tile row, tile col, row0, row1, col0, col1)
+    def tile_windows(self, row0, row1, col0, col1):
+        for tile_row in range(row0 // TILE_CELLS, (row1 - 1) // TILE_CELLS + 1):
+            for tile_col in range(col0 // TILE_CELLS, (col1 - 1) // TILE_CELLS + 1):
+                top, left = tile_row * TILE_CELLS, tile_col * TILE_CELLS
+                yield (tile_row, tile_col, max(row0, top), min(row1, top + TILE_CELLS),
+                       max(col0, left), min(col1, left + TILE_CELLS))
+
+    # View of a tile's cells in a window, giving the tile a fine array first if needed
+    def writable(self, tile_row, tile_col, row0, row1, col0, col1):
+        if not self.pool.flags.writeable:
+            self.slots, self.values, self.pool = np.array(self.slots), np.array(self.values), np.array(self.pool)
+        slot = int(self.slots[tile_row, tile_col])
+        if slot < 0:
+            if self.free:
+                slot = self.free.pop()
+            else:
+                slot = self.used
+                if slot == len(self.pool):
+                    grown = np.empty((max(2 * len(self.pool), 16), TILE_CELLS, TILE_CELLS), dtype=np.float32)
+                    grown[:len(self.pool)] = self.pool
+                    self.pool = grown
+                self.used += 1
+            self.pool[slot] = self.values[tile_row, tile_col]
+            self.slots[tile_row, tile_col] = slot
+        top, left = tile_row * TILE_CELLS, tile_col * TILE_CELLS
+        return self.pool[slot, row0 - top:row1 - top, col0 - left:col1 - left]
+
+    # Give a fine tile that turned out uniform back to the pool
+    def compact(self, tile_row, tile_col):
+        slot = int(self.slots[tile_row, tile_col])
+        tile = self.pool[slot]
+        low = tile.min()
+        if low == tile.max():
+            self.values[tile_row, tile_col] = low
+            self.slots[tile_row, tile_col] = -1
+            self.free.append(slot)
+
+    def clamped_field(self, obs, xs, ys):
+        return np.clip(obstacle_distance_field(obs, xs, ys), -self.max_distance, self.max_distance)
+
+    def stamp(self, obs):
+        for tile_row, tile_col, row0, row1, col0, col1 in self.tile_windows(*self.obstacle_window(obs)):
+            if row0 >= row1 or col0 >= col1:
+                continue
+            field = self.clamped_field(obs, *self.cell_centres(row0, row1, col0, col1))
+            if self.slots[tile_row, tile_col] < 0 and self.values[tile_row, tile_col] <= field.min():
+                continue
+            view = self.writable(tile_row, tile_col, row0, row1, col0, col1)
+            np.minimum(view, field, out=view)
+            self.compact(tile_row, tile_col)
+
+    def erase(self, obs, remaining):
+        window = self.obstacle_window(obs)
+        row0, row1, col0, col1 = window
+        nearby = []
+        for other in remaining:
+            orow0, orow1, ocol0, ocol1 = self.obstacle_window(other)
+            if orow0 < row1 and orow1 > row0 and ocol0 < col1 and ocol1 > col0:
+                nearby.append(other)
+        for tile_row, tile_col, row0, row1, col0, col1 in self.tile_windows(*window):
+            if row0 >= row1 or col0 >= col1:
+                continue
+            if self.slots[tile_row, tile_col] < 0 and self.values[tile_row, tile_col] >= self.max_distance:
+                continue
+            xs, ys = self.cell_centres(row0, row1, col0, col1)
+            view = self.writable(tile_row, tile_col, row0, row1, col0, col1)
+            view.fill(self.max_distance)
+            for other in nearby:
+                np.minimum(view, self.clamped_field(other, xs, ys), out=view)
+            self.compact(tile_row, tile_col)
+
+    def clear(self):
+        self.slots = np.full((self.tile_rows, self.tile_cols), -1, dtype=np.int32)
+        self.values = np.full((self.tile_rows, self.tile_cols), self.max_distance, dtype=np.float32)
+        self.pool = np.empty((0, TILE_CELLS, TILE_CELLS), dtype=np.float32)
+        self.used = 0
+        self.free = []
+
+    # Fine tiles renumbered in row-major order, without the pool's free slots
+    def pack(self):
+        slots = np.full_like(self.slots, -1)
+        live = self.slots >= 0
+        slots[live] = np.arange(live.sum(), dtype=np.int32)
+        return {"tile_slots": slots, "tile_values": self.values, "tiles": self.pool[self.slots[live]]}
+
+    def lookup(self, point):
+        col = int(point[0] / self.resolution)
+        row = int(point[1] / self.resolution)
+        if point[0] < 0 or point[1] < 0 or row >= self.rows or col >= self.cols:
+            return None
+        tile_row, tile_col = row // TILE_CELLS, col // TILE_CELLS
+        slot = self.slots[tile_row, tile_col]
+        if slot < 0:
+            return float(self.values[tile_row, tile_col])
+        return float(self.pool[slot, row % TILE_CELLS, col % TILE_CELLS])
+
+    def cell_distances(self, rows, cols):
+        tile_rows, tile_cols = rows // TILE_CELLS, cols // TILE_CELLS
+        d = self.values[tile_rows, tile_cols]
+        slots = self.slots[tile_rows, tile_cols]
+        fine = slots >= 0
+        d[fine] = self.pool[slots[fine], rows[fine] % TILE_CELLS, cols[fine] % TILE_CELLS]
+        return d
+
+
+# (cols, rows) of a grid with cells of resolution over a width x height map
+def grid_shape(width, height, resolution):
+    return int(math.ceil(width / resolution)) + 1, int(math.ceil(height / resolution)) + 1
+
+
+def dense_fits(width, height, resolution):
+    cols, rows = grid_shape(width, height, resolution)
+    return cols * rows <= DENSE_CELL_LIMIT
+
+
+# The field stored by pack(): the dense array, or for TiledDistanceGrid its tile arrays
+def unpack_field(arrays):
+    if "field" in arrays:
+        return arrays["field"]
+    return {name: arrays[name] for name in ("tile_slots", "tile_values", "tiles")}
+
+
+# Axis-aligned bounding box of a tagged obstacle as (x0, y0, x1, y1)
+def obstacle_bounds(obs):
+    if obs[0] == "circle":
+        _, cx, cy, r = obs
+        return cx - r, cy - r, cx + r, cy + r
+    _, x, y, w, h = obs
+    return x, y, x + w, y + h
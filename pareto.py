@@ -0,0 +1,36 @@
+import bisect
+import math
+
+
+# Non-dominated set of (cost, distance-to-goal) pairs for the MOD-RRT* dominance test.
+# Kept as a skyline sorted by cost, so distances are strictly decreasing along it and
+# the best distance among all entries no more expensive than a given cost is found by
+# one bisect.
+class ParetoFront:
+    def __init__(self, goal):
+        self.goal = goal
+        self.costs = []
+        self.distances = []
+
+    def __len__(self):
+        return len(self.costs)
+
+    def goal_distance(self, point):
+        return math.hypot(point[0] - self.goal[0], point[1] - self.goal[1])
+
+    # Check if some entry has cost <= cost and distance <= goal_distance
+    def dominated(self, cost, goal_distance):
+        i = bisect.bisect_right(self.costs, cost)
+        return i > 0 and self.distances[i - 1] <= goal_distance
+
+    # Add a pair, dropping the entries it dominates. Returns False if it was dominated.
+    def insert(self, cost, goal_distance):
+        if self.dominated(cost, goal_distance):
+            return False
+        i = bisect.bisect_left(self.costs, cost)
+        j = i
+        while j < len(self.costs) and self.distances[j] >= goal_distance:
+            j += 1
+        self.costs[i:j] = [cost]
+        self.distances[i:j] = [goal_distance]
+        return True
@@ -0,0 +1,761 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from occupancy import obstacle_bounds
+from sampling import UniformSampler, make_sampler
+from tree import Node, Tree
+from world import distance, points_in_obstacle, segments_intersect
+
+STEP_SIZE = 20
+NEAR_RADIUS = 50
+MAX_ATTEMPTS = 1000
+BATCH_SIZE = 64
+# Seconds of expansion per frame in the interactive loops; the rest of a 30 fps
+# frame is left for rendering and event handling
+FRAME_BUDGET = 0.012
+
+
+# Outcome of a headless planning run. The path runs from start to goal.
+class PlanResult:
+    def __init__(self, success, path, cost, nodes, iterations, restarts, elapsed, seed=None, history=None):
+        self.success = success
+        self.path = path
+        self.cost = cost
+        self.nodes = nodes
+        self.iterations = iterations
+        self.restarts = restarts
+        self.elapsed = elapsed
+        self.seed = seed
+        # (elapsed, cost) of each strictly better path an anytime run found
+        self.history = history or []
+
+    # The path streamed through interpolation and smoothing (see iter_waypoints)
+    def waypoints(self, interpolate=True, smooth=True):
+        return iter_waypoints(self.path, interpolate=interpolate, smooth=smooth)
+
+    def __repr__(self):
+        return ("PlanResult(success=%r, cost=%.1f, path_nodes=%d, tree_nodes=%d, iterations=%d, elapsed=%.3fs)"
+                % (self.success, self.cost, len(self.path), self.nodes.node_count(), self.iterations,
+                   self.elapsed))
+
+
+# Base observer for plan(); subclasses override the hooks they care about
+class PlannerObserver:
+    def tree_reset(self, nodes):
+        pass
+
+    def node_added(self, node):
+        pass
+
+    def path_found(self, result):
+        pass
+
+    # Anytime runs call this for every strictly better path, before path_found at the end
+    def path_improved(self, result):
+        pass
+
+
+# Move STEP_SIZE from one point towards another
+def steer(from_point, to_point, step_size=STEP_SIZE):
+    angle = math.atan2(to_point[1] - from_point[1], to_point[0] - from_point[0])
+    return (from_point[0] + step_size * math.cos(angle), from_point[1] + step_size * math.sin(angle))
+
+
+# Extend the RRT* Tree with obstacle avoidance and Pareto dominance.
+# Returns the new node, or None if no sample was accepted within max_attempts.
+def mod_rrt_star(nodes, world, goal, rng=random, step_size=STEP_SIZE, max_attempts=MAX_ATTEMPTS, sampler=None,
+                 profiler=None):
+    front = nodes.pareto_front(goal)
+    sampler = sampler or UniformSampler(world)
+    for _ in range(max_attempts):
+        rand_point = sampler.sample(rng)
+        nearest = nodes.nearest(rand_point)
+        nearest_point = nodes.point(nearest)
+
+        # Calculate cost and distance to goal for the new point
+        new_point = steer(nearest_point, rand_point, step_size)
+        new_cost = float(nodes.costs[nearest]) + distance(nearest_point, new_point)
+        new_distance_to_goal = distance(new_point, goal)
+
+        # Check for collision with static and dynamic obstacles
+        times = nodes.edge_times(float(nodes.costs[nearest]), new_cost)
+        if world.in_obstacle(new_point):
+            if profiler:
+                profiler.reject("obstacle")
+            continue
+        if world.line_intersects_obstacle(nearest_point, new_point, times):
+            if profiler:
+                profiler.reject("blocked_edge")
+            continue
+
+        # Check for Pareto dominance
+        if not front.dominated(new_cost, new_distance_to_goal):
+            return Node(nodes, nodes.add(new_point, nearest, new_cost))
+        if profiler:
+            profiler.reject("dominated")
+    return None
+
+
+# Extend the tree with obstacle avoidance (Dynamic RRT*)
+def dynamic_rrt(nodes, world, goal, rng=random, step_size=STEP_SIZE, max_attempts=MAX_ATTEMPTS, sampler=None,
+                profiler=None):
+    sampler = sampler or UniformSampler(world)
+    for _ in range(max_attempts):
+        rand_point = sampler.sample(rng)
+        nearest = nodes.nearest(rand_point)
+        nearest_point = nodes.point(nearest)
+        new_point = steer(nearest_point, rand_point, step_size)
+        new_cost = float(nodes.costs[nearest]) + distance(nearest_point, new_point)
+        times = nodes.edge_times(float(nodes.costs[nearest]), new_cost)
+
+        if world.in_obstacle(new_point):
+            if profiler:
+                profiler.reject("obstacle")
+        elif world.line_intersects_obstacle(nearest_point, new_point, times):
+            if profiler:
+                profiler.reject("blocked_edge")
+        else:
+            return Node(nodes, nodes.add(new_point, nearest, new_cost))
+    return None
+
+
+# Grow tree from its node nearest to target towards target, one step_size at a time,
+# while each step is collision-free and not dominated in the tree's front towards
+# tree_goal. Returns the last node reached and whether it connects to target.
+def connect(tree, target, world, tree_goal, step_size=STEP_SIZE):
+    front = tree.pareto_front(tree_goal)
+    last = tree.nearest(target)
+    last_point = tree.point(last)
+    while distance(last_point, target) >= step_size:
+        new_point = steer(last_point, target, step_size)
+        new_cost = float(tree.costs[last]) + step_size
+        times = tree.edge_times(float(tree.costs[last]), new_cost)
+        if world.in_obstacle(new_point) or world.line_intersects_obstacle(last_point, new_point, times):
+            return last, False
+        if front.dominated(new_cost, distance(new_point, tree_goal)):
+            return last, False
+        last = tree.add(new_point, last, new_cost)
+        last_point = new_point
+    cost = float(tree.costs[last])
+    times = tree.edge_times(cost, cost + distance(last_point, target))
+    return last, not world.line_intersects_obstacle(last_point, target, times)
+
+
+# Copy the branch of goal_tree from node branch back to the goal into nodes, hanging
+# off node parent, and return the copy of the goal. Each goal-tree node is copied at
+# most once: a branch that reaches a node copied by an earlier graft joins that copy,
+# which moves (with everything below it) onto the new branch, so nodes keeps a single
+# copy of the goal. Adds nothing and returns None unless the path is strictly cheaper
+# than the one through the existing copy of the goal, or if any edge of the new branch
+# is blocked (moving obstacles are checked now that its arrival times are known).
+def graft(nodes, parent, goal_tree, branch, world):
+    # Copies are tracked by index, so renumbering either tree forgets them
+    key = (goal_tree, goal_tree.generation, nodes.generation)
+    if nodes.grafted_key != key:
+        nodes.grafted = {}
+        nodes.grafted_key = key
+    indices = goal_tree.path_indices(branch)
+    fresh = next((k for k, i in enumerate(indices) if i in nodes.grafted), len(indices))
+    # The new nodes, then the copy they join, if any
+    chain = np.vstack([nodes.points[parent:parent + 1], goal_tree.points[indices[:fresh + 1]]])
+    costs = nodes.costs[parent] + np.cumsum(np.hypot(*np.diff(chain, axis=0).T))
+    if fresh < len(indices):
+        join = nodes.grafted[indices[fresh]]
+        # The copy of the goal lies below join, so this is also the change in path cost
+        delta = float(costs[-1] - nodes.costs[join])
+        if delta >= 0:
+            return None
+    times = nodes.edge_times(np.concatenate([nodes.costs[parent:parent + 1], costs[:-1]]), costs)
+    if world.line_intersects_obstacle_many(chain[:-1], chain[1:], times).any():
+        return None
+    if fresh < len(indices) and not subtree_clear(nodes, world, join, delta):
+        return None
+
+    last = parent
+    if fresh:
+        parents = np.arange(len(nodes) - 1, len(nodes) - 1 + fresh)
+        parents[0] = parent
+        added = nodes.add_many(chain[1:fresh + 1], parents, costs[:fresh])
+        nodes.grafted.update(zip(indices[:fresh], added))
+        last = added[-1]
+    if fresh < len(indices):
+        nodes.reparent(join, last)
+        nodes.shift_costs(join, delta)
+    return nodes.grafted[indices[-1]]
+
+
+# Bidirectional MOD-RRT*: a second tree grows from the goal (kept as nodes.goal_tree,
+# with its own dominance front towards the start). Each call extends the start tree
+# towards a sample and connects the goal tree to the new node, then extends the goal
+# tree and connects the start tree to that. Where the trees meet, the goal tree's
+# branch is copied into the start tree, so the path ends at the goal itself.
+# Returns the last node added to the start tree, or None if none was.
+def bidirectional_mod_rrt_star(nodes, world, goal, rng=random, step_size=STEP_SIZE, max_attempts=MAX_ATTEMPTS,
+                               sampler=None, profiler=None):
+    goal = tuple(goal)
+    if nodes.goal_tree is None or nodes.goal_tree.point(0) != goal:
+        nodes.goal_tree = Tree(goal)
+        if profiler:
+            profiler.tree(nodes.goal_tree)
+    goal_tree = nodes.goal_tree
+    goal_tree.timed = False
+    start = nodes.point(0)
+
+    size = len(nodes)
+    # Either tree may be unable to grow (its front can saturate); the other still tries
+    new_node = mod_rrt_star(nodes, world, goal, rng, step_size, max_attempts, sampler, profiler)
+    if new_node is not None:
+        meet, connected = connect(goal_tree, new_node.point, world, start, step_size)
+        if connected:
+            goal_index = graft(nodes, new_node.index, goal_tree, meet, world)
+            if goal_index is not None:
+                return Node(nodes, goal_index)
+
+    goal_node = mod_rrt_star(goal_tree, world, start, rng, step_size, max_attempts, sampler, profiler)
+    if goal_node is not None:
+        meet, connected = connect(nodes, goal_node.point, world, goal, step_size)
+        if connected:
+            goal_index = graft(nodes, meet, goal_tree, goal_node.index, world)
+            if goal_index is not None:
+                return Node(nodes, goal_index)
+    return nodes[-1] if len(nodes) > size else None
+
+
+# Connection radius of RRT*: gamma * (log n / n) ** (1 / d) with d = 2, where gamma
+# is just above the bound 2 * (1 + 1/d) ** (1/d) * (area / unit ball) ** (1/d) for
+# asymptotic optimality. Capped at near_radius(step_size) so early iterations stay local.
+def rrt_star_radius(n, world, step_size=STEP_SIZE):
+    cap = near_radius(step_size)
+    gamma = 2 * math.sqrt(1.5) * math.sqrt(world.width * world.height / math.pi)
+    if n < 2:
+        return cap
+    return min(gamma * math.sqrt(math.log(n) / n), cap)
+
+
+# Largest neighbourhood radius: NEAR_RADIUS at the default step, growing with longer
+# steps so the neighbourhood of a new node still reaches past the node it grew from.
+# Edges that long pass well clear of their end nodes, which is why choose-parent and
+# rewiring check them against every obstacle (line_intersects_obstacle), not just the
+# dynamic ones.
+def near_radius(step_size=STEP_SIZE):
+    return NEAR_RADIUS * max(1.0, step_size / STEP_SIZE)
+
+
+# Neighbour count of k-nearest RRT*: k = 2e * log n
+def rrt_star_k(n):
+    return max(1, int(math.ceil(2 * math.e * math.log(max(n, 2)))))
+
+
+# Extend the RRT* Tree, choosing the cheapest parent and rewiring the neighbourhood.
+# neighbours is "radius" (shrinking radius from rrt_star_radius) or "knn" (rrt_star_k
+# nearest nodes); either way the neighbourhood stays O(log n) as the tree grows.
+def extend_rrt_star(nodes, world, goal, rng=random, step_size=STEP_SIZE, max_attempts=MAX_ATTEMPTS,
+                    neighbours="radius", sampler=None, profiler=None):
+    sampler = sampler or UniformSampler(world)
+    for _ in range(max_attempts):
+        rand_point = sampler.sample(rng)
+        nearest = nodes.nearest(rand_point)
+        nearest_point = nodes.point(nearest)
+        new_point = steer(nearest_point, rand_point, step_size)
+        nearest_cost = float(nodes.costs[nearest])
+        times = nodes.edge_times(nearest_cost, nearest_cost + distance(nearest_point, new_point))
+
+        if world.in_obstacle(new_point):
+            if profiler:
+                profiler.reject("obstacle")
+            continue
+        if world.line_intersects_obstacle(nearest_point, new_point, times):
+            if profiler:
+                profiler.reject("blocked_edge")
+            continue
+
+        # Choose the cheapest parent among the neighbours
+        if profiler:
+            started = profiler.start()
+        n = nodes.node_count() + 1
+        if neighbours == "knn":
+            near = nodes.k_nearest(new_point, rrt_star_k(n))
+        else:
+            near = find_near_nodes(nodes, new_point, rrt_star_radius(n, world, step_size))
+        near = np.array(near, dtype=np.int64)
+        near_points = nodes.points[near]
+        edge_lengths = np.hypot(near_points[:, 0] - new_point[0], near_points[:, 1] - new_point[1])
+        via_near = nodes.costs[near] + edge_lengths
+        min_cost_node = nearest
+        min_cost = nearest_cost + distance(nearest_point, new_point)
+        for i in np.argsort(via_near, kind="stable").tolist():
+            if via_near[i] >= min_cost:
+                break
+            times = nodes.edge_times(float(nodes.costs[near[i]]), float(via_near[i]))
+            if not world.line_intersects_obstacle(nodes.point(near[i]), new_point, times):
+                min_cost = float(via_near[i])
+                min_cost_node = int(near[i])
+                break
+        new_index = nodes.add(new_point, min_cost_node, min_cost)
+
+        # Rewire the neighbours that are cheaper to reach through the new node, and pass
+        # the saving on to their descendants. None of them is an ancestor of the new
+        # node, whose cost is higher than all of its ancestors'.
+        rewire_costs = min_cost + edge_lengths
+        rewire = np.flatnonzero(rewire_costs < nodes.costs[near])
+        if len(rewire):
+            times = nodes.edge_times(rewire_costs[rewire], min_cost)
+            rewire = rewire[~world.line_intersects_obstacle_many(near_points[rewire], new_point, times)]
+            for i, cost in zip(near[rewire].tolist(), rewire_costs[rewire].tolist()):
+                # Rewiring an ancestor may already have brought the cost down
+                delta = cost - float(nodes.costs[i])
+                if delta < 0 and subtree_clear(nodes, world, i, delta):
+                    nodes.reparent(i, new_index)
+                    nodes.shift_costs(i, delta)
+        if profiler:
+            profiler.stop("rewire", started)
+        return Node(nodes, new_index)
+    return None
+
+
+# Moving a subtree changes when its edges are traversed, so with moving obstacles check
+# the edges below node i again as if their costs were shifted by delta
+def subtree_clear(nodes, world, i, delta):
+    if not world.moving_obstacles or not nodes.timed:
+        return True
+    below = np.array(nodes.subtree(i)[1:], dtype=np.int64)
+    if len(below) == 0:
+        return True
+    parents = nodes.parents[below]
+    return not world.intersects_moving_obstacle_many(nodes.points[parents], nodes.points[below],
+                                                     nodes.costs[parents] + delta, nodes.costs[below] + delta).any()
+
+
+# Find the indices of the nodes in the neighborhood of a point
+def find_near_nodes(nodes, point, radius):
+    return nodes.near(point, radius)
+
+
+# Draw a batch of samples, steer each towards its nearest node and drop the ones
+# that land in an obstacle. Returns (parents, new_points, new_costs) for the
+# survivors, with parents as node indices.
+def sample_batch(nodes, world, np_rng, batch_size=BATCH_SIZE, step_size=STEP_SIZE, sampler=None, profiler=None):
+    rand_points = (sampler or UniformSampler(world)).sample_many(np_rng, batch_size)
+    nearest = nodes.nearest_many(rand_points)
+    parent_points = nodes.points[nearest]
+
+    # Steer: step_size along the direction to the sample (atan2 gives angle 0 for
+    # a sample on top of its parent, so do the same here)
+    delta = rand_points - parent_points
+    length = np.hypot(delta[:, 0], delta[:, 1])
+    direction = np.where(length[:, None] > 0, delta / np.maximum(length, 1e-12)[:, None], [1.0, 0.0])
+    new_points = parent_points + step_size * direction
+
+    free = np.flatnonzero(~world.in_obstacle_many(new_points))
+    if profiler:
+        profiler.reject("obstacle", batch_size - len(free))
+    parents = nearest[free]
+    return parents, new_points[free], nodes.costs[parents] + step_size
+
+
+# Positions of the samples whose edge from their parent misses every obstacle
+def edges_free(nodes, parents, new_points, world, new_costs, profiler=None):
+    times = nodes.edge_times(nodes.costs[parents], new_costs)
+    free = np.flatnonzero(~world.line_intersects_obstacle_many(nodes.points[parents], new_points, times))
+    if profiler:
+        profiler.reject("blocked_edge", len(parents) - len(free))
+    return free
+
+
+def commit_batch(nodes, parents, new_points, new_costs, keep):
+    return [Node(nodes, i) for i in nodes.add_many(new_points[keep], parents[keep], new_costs[keep])]
+
+
+# Batched MOD-RRT*: filter a whole batch of samples for collision and dominance with
+# array operations, then commit the survivors. Returns the list of new nodes.
+# Dominance is transitive, so committing the batch in order is the same as keeping
+# every sample that is dominated neither by the front nor by an earlier sample.
+def mod_rrt_star_batch(nodes, world, goal, np_rng, batch_size=BATCH_SIZE, step_size=STEP_SIZE, sampler=None,
+                       profiler=None):
+    front = nodes.pareto_front(goal)
+    parents, new_points, new_costs = sample_batch(nodes, world, np_rng, batch_size, step_size, sampler, profiler)
+    if len(parents) == 0:
+        return []
+
+    # Dominance against the front as it was before this batch
+    if profiler:
+        started = profiler.start()
+    goal_distances = np.hypot(new_points[:, 0] - goal[0], new_points[:, 1] - goal[1])
+    i = np.searchsorted(front.costs, new_costs, side="right")
+    # An index of 0 wraps round to the inf sentinel: nothing is cheaper
+    best = np.asarray(front.distances + [math.inf])[i - 1]
+    candidates = np.flatnonzero(best > goal_distances)
+    if profiler:
+        profiler.stop("dominance", started)
+        profiler.reject("dominated", len(parents) - len(candidates))
+    candidates = candidates[edges_free(nodes, parents[candidates], new_points[candidates], world,
+                                                new_costs[candidates], profiler)]
+    if len(candidates) == 0:
+        return []
+
+    # Dominance by earlier samples of the same batch
+    if profiler:
+        started = profiler.start()
+    costs = new_costs[candidates]
+    distances = goal_distances[candidates]
+    dominates = (costs[:, None] <= costs[None, :]) & (distances[:, None] <= distances[None, :])
+    earlier = np.tril(np.ones((len(candidates), len(candidates)), dtype=bool), -1).T
+    keep = candidates[~(dominates & earlier).any(axis=0)]
+    if profiler:
+        profiler.stop("dominance", started)
+        profiler.reject("dominated", len(candidates) - len(keep))
+    return commit_batch(nodes, parents, new_points, new_costs, keep)
+
+
+# Batched Dynamic RRT*: commits every collision-free sample of the batch
+def dynamic_rrt_batch(nodes, world, goal, np_rng, batch_size=BATCH_SIZE, step_size=STEP_SIZE, sampler=None,
+                      profiler=None):
+    parents, new_points, new_costs = sample_batch(nodes, world, np_rng, batch_size, step_size, sampler, profiler)
+    keep = edges_free(nodes, parents, new_points, world, new_costs, profiler)
+    return commit_batch(nodes, parents, new_points, new_costs, keep)
+
+
+# Repair the tree after obstacles appeared instead of starting over. Only nodes near
+# the obstacles are checked: nodes inside one are dropped, and each subtree cut off by
+# a blocked edge (or a dropped parent) is reattached to the cheapest surviving node it
+# can reach within radius (by default the RRT* radius), or dropped if there is none.
+# max_edge bounds the edge length in the tree (rewiring never links nodes further
+# apart than near_radius(step_size), the default). A goal tree hanging off nodes is
+# repaired the same way. Removed nodes only leave empty slots behind (see Tree.remove),
+# so the cost follows the nodes near the obstacles and the subtrees cut off, not the
+# size of the tree. Returns the number of nodes removed.
+def repair_tree(nodes, world, obstacles, radius=None, max_edge=None, step_size=STEP_SIZE):
+    removed = 0
+    if nodes.goal_tree is not None:
+        removed = repair_tree(nodes.goal_tree, world, obstacles, radius, max_edge, step_size)
+    if radius is None:
+        radius = rrt_star_radius(nodes.node_count(), world, step_size)
+    if max_edge is None:
+        max_edge = near_radius(step_size)
+    dead = set()
+    cut = set()
+    # Every node that could take in an orphan lies within radius of the edges checked
+    pool = set()
+    for obs in obstacles:
+        x0, y0, x1, y1 = obstacle_bounds(obs)
+        centre = ((x0 + x1) / 2, (y0 + y1) / 2)
+        reach = math.hypot(x1 - x0, y1 - y0) / 2 + world.clearance + max_edge
+        pool.update(nodes.near(centre, reach + radius))
+        near = np.array(nodes.near(centre, reach), dtype=np.int64)
+        near = near[near != 0]
+        inside = points_in_obstacle(nodes.points[near], obs, world.clearance)
+        dead.update(near[inside].tolist())
+        near = near[~inside]
+        blocked = segments_intersect(nodes.points[near], nodes.points[nodes.parents[near]], [obs])
+        cut.update(near[blocked].tolist())
+    if not dead and not cut:
+        return removed
+
+    # Orphaned subtrees hang off blocked edges and dropped nodes
+    dead_children = {child for i in dead for child in nodes.children(i)}
+    orphan_roots = sorted((cut | dead_children) - dead, key=lambda i: nodes.costs[i])
+    subtrees = nodes.subtrees(orphan_roots, stop=dead | set(orphan_roots))
+    detached = np.zeros(len(nodes), dtype=bool)
+    detached[list(dead)] = True
+    for subtree in subtrees:
+        detached[subtree] = True
+
+    # Reattach the cheapest orphans first, so later ones can hang off them
+    pool = np.array(sorted(pool), dtype=np.int64)
+    pool_points = nodes.points[pool]
+    for root, subtree in zip(orphan_roots, subtrees):
+        point = nodes.point(root)
+        edge_lengths = np.hypot(pool_points[:, 0] - point[0], pool_points[:, 1] - point[1])
+        near = np.flatnonzero((edge_lengths <= radius) & ~detached[pool])
+        via_near = nodes.costs[pool[near]] + edge_lengths[near]
+        near = pool[near]
+        for i in np.argsort(via_near, kind="stable").tolist():
+            times = nodes.edge_times(float(nodes.costs[near[i]]), float(via_near[i]))
+            shift = float(via_near[i] - nodes.costs[root])
+            if (not world.line_intersects_obstacle(nodes.point(near[i]), point, times)
+                    and subtree_clear(nodes, world, root, shift)):
+                nodes.costs[subtree] += shift
+                nodes.reparent(root, int(near[i]))
+                detached[subtree] = False
+                break
+
+    # Costs changed, so the dominance front is stale, and grafted copies may no longer
+    # lead to the copy of the goal. What is still detached is whole subtrees: everything
+    # below a dropped node or an orphan root is either detached with it or was moved.
+    nodes.front = None
+    nodes.grafted = {}
+    detached = np.flatnonzero(detached)
+    if len(detached):
+        nodes.remove(detached)
+    return removed + len(detached)
+
+
+ALGORITHMS = {
+    "mod_rrt_star": mod_rrt_star,
+    "dynamic_rrt": dynamic_rrt,
+    "extend_rrt_star": extend_rrt_star,
+    "bidirectional_mod_rrt_star": bidirectional_mod_rrt_star,
+}
+
+BATCH_ALGORITHMS = {
+    "mod_rrt_star": mod_rrt_star_batch,
+    "dynamic_rrt": dynamic_rrt_batch,
+}
+
+
+# Call expand() repeatedly until budget seconds have passed or it returns a node for
+# which done(node) is true. Returns that node, or None when the time ran out.
+def expand_for(expand, done, budget=FRAME_BUDGET):
+    deadline = time.perf_counter() + budget
+    while True:
+        node = expand()
+        if node is not None and done(node):
+            return node
+        if time.perf_counter() >= deadline:
+            return None
+
+
+# Walk parent links from a node back to the root; the path runs node -> root
+def extract_path(node):
+    return [tuple(point) for point in node.tree.path_points(node.index).tolist()]
+
+
+# Lazy extract_path: yields the points one at a time as the parent links are walked.
+# With from_root it runs root -> node instead, which needs the node indices (but not
+# the points) collected first.
+def iter_path(node, from_root=False):
+    tree = node.tree
+    if from_root:
+        indices = reversed(tree.path_indices(node.index))
+    else:
+        indices = tree.iter_path_indices(node.index)
+    for i in indices:
+        yield tree.point(i)
+
+
+# Check if the path to a node intersects with any obstacle (moving ones at the times
+# the robot would pass)
+def path_intersects_obstacle(node, world):
+    tree = node.tree
+    indices = tree.path_indices(node.index)
+    path = tree.points[indices]
+    costs = tree.costs[indices]
+    times = tree.edge_times(costs[:-1], costs[1:])
+    return bool(world.line_intersects_obstacle_many(path[:-1], path[1:], times).any())
+
+
+# Interpolate curves between points using spline interpolation
+def interpolate_path(path):
+    return list(iter_interpolated(path))
+
+
+# Lazy interpolate_path: takes any iterable of points and yields each segment's
+# points as soon as both of its ends have arrived
+def iter_interpolated(path):
+    points = iter(path)
+    previous = next(points, None)
+    for point in points:
+        yield from interpolate_segment(previous, point)
+        previous = point
+
+
+# Interpolate a curve between two points using cubic spline interpolation
+def interpolate_segment(point1, point2):
+    t = np.linspace(0, 1, 10)
+    x = (1 - t) * point1[0] + t * point2[0]
+    y = (1 - t) * point1[1] + t * point2[1]
+    return list(zip(x, y))
+
+
+# Smooth the path by optimizing the positions of the points
+def smooth_path(path):
+    return list(iter_smoothed(path, path[-1]))
+
+
+# Lazy smooth_path. Each point is tested against the line from the first point to the
+# last, so pass end (the last point) to stream; without it the path is read in full
+# before anything is yielded. Every point is held back one step, as the last is always kept.
+def iter_smoothed(path, end=None):
+    if end is None:
+        path = list(path)
+        if not path:
+            return
+        end = path[-1]
+    points = iter(path)
+    first = next(points, None)
+    if first is None:
+        return
+    yield first  # Start with the first point
+
+    # Calculate the angle between the start and end points
+    angle1 = math.atan2(end[1] - first[1], end[0] - first[0])
+    previous = next(points, None)
+    if previous is None:
+        return
+    for point in points:
+        angle2 = math.atan2(previous[1] - first[1], previous[0] - first[0])
+
+        # Check if the current point significantly deviates from the straight line
+        if abs(angle1 - angle2) > math.pi / 30:  # Adjust the threshold angle as needed
+            yield previous  # Add the current point to the smoothed path
+        previous = point
+
+    yield previous  # Add the last point
+
+
+# Stream a path (any iterable of points) through interpolation and smoothing, one
+# waypoint at a time; no stage holds more than a segment, so a consumer can act on the
+# first waypoints before the rest exist. end is the last point of the path, which
+# smoothing needs up front: it is looked up for lists and tuples, and must be passed
+# for other iterables (such as iter_path) to keep them streaming.
+def iter_waypoints(path, end=None, interpolate=True, smooth=True):
+    if end is None and isinstance(path, (list, tuple)) and path:
+        end = path[-1]
+    waypoints = iter(path)
+    if interpolate:
+        waypoints = iter_interpolated(waypoints)
+    if smooth:
+        waypoints = iter_smoothed(waypoints, end)
+    return waypoints
+
+
+# Run a planner headless, expanding as fast as the CPU allows.
+# budget caps the number of expansions; time_limit (seconds) caps wall-clock time.
+# With batch_size set, each expansion draws and filters that many samples at once
+# (only for the algorithms in BATCH_ALGORITHMS). When a path to the goal turns out to
+# cross a dynamic obstacle the tree is repaired around it, or with repair=False thrown
+# away and regrown from the start; either way it counts as a restart. stop is an
+# optional event (threading or multiprocessing); the run gives up once it is set.
+# With anytime=True the run does not end at the first path: it keeps expanding (and,
+# for extend_rrt_star, rewiring) until the budget or time limit runs out, reports each
+# strictly cheaper path to observer.path_improved, and returns the best one with the
+# (elapsed, cost) history of improvements.
+# Samples come from sampler (see sampling.py), by default uniform; goal_bias sends that
+# share of them to the goal, and informed=True narrows them to the start-goal ellipse
+# of the best path so far, which only matters for anytime runs.
+# profiler (a profiling.PlannerProfiler) collects phase times, rejected samples and
+# tree sizes for the run, adding to whatever it already holds.
+def plan(world, start, goal, budget=10000, algorithm="mod_rrt_star", seed=None, time_limit=None,
+         step_size=STEP_SIZE, observer=None, batch_size=None, repair=True, stop=None, anytime=False,
+         goal_bias=0.0, informed=False, sampler=None, profiler=None):
+    sampler = sampler or make_sampler(world, start, goal, goal_bias, informed)
+    if profiler:
+        run_started = profiler.start()
+        world = profiler.world(world)
+        sampler = profiler.sampler(sampler)
+    if algorithm not in ALGORITHMS:
+        raise ValueError("unknown algorithm %r; expected one of %s" % (algorithm, ", ".join(sorted(ALGORITHMS))))
+    if batch_size and algorithm not in BATCH_ALGORITHMS:
+        raise ValueError("%s has no batched expander; batch_size needs one of %s"
+                         % (algorithm, ", ".join(sorted(BATCH_ALGORITHMS))))
+    if batch_size:
+        batch_expand = BATCH_ALGORITHMS[algorithm]
+        np_rng = np.random.default_rng(seed)
+
+        def expand(nodes, world, goal, rng, step_size):
+            return batch_expand(nodes, world, goal, np_rng, batch_size, step_size, sampler, profiler)
+    else:
+        single_expand = ALGORITHMS[algorithm]
+
+        def expand(nodes, world, goal, rng, step_size):
+            new_node = single_expand(nodes, world, goal, rng=rng, step_size=step_size, sampler=sampler,
+                                     profiler=profiler)
+            return [new_node] if new_node else []
+    rng = random.Random(seed)
+    start_time = time.perf_counter()
+    nodes = Tree(start)
+    if profiler:
+        profiler.tree(nodes)
+    if observer:
+        observer.tree_reset(nodes)
+
+    iterations = 0
+    restarts = 0
+    best = None
+    history = []
+    # Nodes within step_size of the goal, for the anytime search; rebuilt whenever the
+    # tree is replaced, renumbered or loses nodes
+    goal_nodes = []
+    tracked = (nodes, nodes.generation, nodes.removed)
+    while iterations < budget:
+        if time_limit is not None and time.perf_counter() - start_time > time_limit:
+            break
+        if stop is not None and stop.is_set():
+            break
+        iterations += 1
+        if profiler:
+            profiler.tree_size(nodes.node_count())
+        size = len(nodes)
+        new_nodes = expand(nodes, world, goal, rng, step_size)
+        if observer:
+            # Every node added, not just the ones returned: the bidirectional planner also
+            # adds the steps of its connections and the branches it grafts
+            for i in range(size, len(nodes)):
+                observer.node_added(nodes[i])
+        for new_node in new_nodes:
+            if distance(new_node.point, goal) < step_size:
+                if path_intersects_obstacle(new_node, world):
+                    restarts += 1
+                    if repair:
+                        if profiler:
+                            started = profiler.start()
+                        repair_tree(nodes, world, world.dynamic_obstacles, step_size=step_size)
+                        if profiler:
+                            profiler.stop("repair", started)
+                    else:
+                        nodes = Tree(start)
+                        if profiler:
+                            profiler.tree(nodes)
+                    if observer:
+                        observer.tree_reset(nodes)
+                    break
+                if not anytime:
+                    path = extract_path(new_node)[::-1]
+                    result = PlanResult(True, path, new_node.cost, nodes, iterations, restarts,
+                                        time.perf_counter() - start_time, seed)
+                    if observer:
+                        observer.path_found(result)
+                    if profiler:
+                        profiler.run_finished(run_started, nodes.node_count())
+                    return result
+                goal_nodes.append(new_node.index)
+
+        if not anytime:
+            continue
+        if tracked != (nodes, nodes.generation, nodes.removed):
+            tracked = (nodes, nodes.generation, nodes.removed)
+            points = nodes.points[:len(nodes)]
+            goal_distances = np.hypot(points[:, 0] - goal[0], points[:, 1] - goal[1])
+            goal_nodes = np.flatnonzero((goal_distances < step_size) & nodes.alive()).tolist()
+        if not goal_nodes:
+            continue
+        # Rewiring can make any goal node cheaper, not just the new ones
+        costs = nodes.costs[goal_nodes]
+        cheapest = int(costs.argmin())
+        if best is None or costs[cheapest] < best.cost:
+            node = nodes[goal_nodes[cheapest]]
+            best = PlanResult(True, extract_path(node)[::-1], node.cost, nodes, iterations, restarts,
+                              time.perf_counter() - start_time, seed, list(history))
+            best.history.append((best.elapsed, best.cost))
+            history = best.history
+            # The path ends within step_size of the goal, so any cheaper one stays
+            # within this bound all the way to the goal
+            sampler.improve(best.cost + step_size)
+            if observer:
+                observer.path_improved(best)
+
+    if best is not None:
+        best.iterations = iterations
+        best.restarts = restarts
+        best.elapsed = time.perf_counter() - start_time
+        if observer:
+            observer.path_found(best)
+        if profiler:
+            profiler.run_finished(run_started, nodes.node_count())
+        return best
+    if profiler:
+        profiler.run_finished(run_started, nodes.node_count())
+    return PlanResult(False, [], math.inf, nodes, iterations, restarts, time.perf_counter() - start_time, seed)
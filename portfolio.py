@@ -0,0 +1,67 @@
+import concurrent.futures
+import math
+import multiprocessing
+import os
+import time
+
+from planner import PlanResult, plan
+from tree import Tree
+
+# Portfolio planning: independent seeded runs of one planner race in a process pool.
+# Run time varies a lot between seeds, so keeping the first path found (or the
+# cheapest one by a deadline) cuts the tail latency of a single run on multi-core
+# machines, and a bad seed no longer means rerunning by hand.
+
+# Per-process state, set once by the pool initializer so that each task only ships a seed
+_worker = {}
+
+
+def _init_worker(world, start, goal, stop, options):
+    _worker.update(world=world, start=start, goal=goal, stop=stop, options=options)
+
+
+def _run_seed(seed):
+    return plan(_worker["world"], _worker["start"], _worker["goal"], seed=seed, stop=_worker["stop"],
+                **_worker["options"])
+
+
+# Race plan() runs with the given seeds (by default one per worker) in workers processes.
+# Without a deadline, returns the first successful result. With a deadline (seconds),
+# returns the cheapest success among the runs finished when it passes, or when all
+# have finished if that is sooner. The remaining runs are stopped as soon as the
+# answer is known. If no run succeeded the result is a failed PlanResult. Extra
+# keyword arguments go to plan(), e.g. algorithm or budget.
+def plan_portfolio(world, start, goal, workers=None, seeds=None, deadline=None, **options):
+    workers = workers or os.cpu_count() or 1
+    seeds = list(range(workers)) if seeds is None else list(seeds)
+    if deadline is not None:
+        options.setdefault("time_limit", deadline)
+    start_time = time.perf_counter()
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    first = None
+    with concurrent.futures.ProcessPoolExecutor(min(workers, len(seeds)), mp_context=context,
+                                                initializer=_init_worker,
+                                                initargs=(world, start, goal, stop, options)) as pool:
+        futures = [pool.submit(_run_seed, seed) for seed in seeds]
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=deadline):
+                if deadline is None and future.result().success:
+                    first = future.result()
+                    break
+        except concurrent.futures.TimeoutError:
+            pass
+        # Queued runs never start; running ones see the event on their next iteration
+        for future in futures:
+            future.cancel()
+        stop.set()
+
+    if first is not None:
+        return first
+    results = [future.result() for future in futures if future.done() and not future.cancelled()]
+    successes = [result for result in results if result.success]
+    if successes:
+        return min(successes, key=lambda result: result.cost)
+    if results:
+        return results[0]
+    return PlanResult(False, [], math.inf, Tree(start), 0, 0, time.perf_counter() - start_time)
@@ -0,0 +1,175 @@
+import time
+
+# Instrumentation for the planners. A PlannerProfiler passed to plan() (or to the
+# expanders, Renderer and PygameObserver) adds up the time spent in each phase of
+# planning, counts the samples rejected for each reason and records the tree size as
+# the run goes on. Without one nothing is wrapped or timed: the planners only test
+# profiler where they reject a sample or rewire.
+#
+# Sampling, nearest-node searches, collision checks and dominance tests are timed by
+# wrapping the objects that do them (world(), sampler() and tree()), so the planners
+# call them as before; rewiring, repair and drawing are timed where they happen with
+# start() and stop(). Phase times are exclusive: a phase that calls into another (a
+# repair running nearest-node searches, say) is charged only for its own time, so the
+# phases add up to the time spent in plan(), whose own share is "other".
+#
+#   profiler = PlannerProfiler()
+#   plan(world, start, goal, profiler=profiler)
+#   print(profiler.report())
+
+# Phases in report order; any others follow them
+PHASES = ("sample", "nearest", "in_obstacle", "line_intersects_obstacle", "intersects_dynamic_obstacle",
+          "dominance", "rewire", "repair", "draw", "other")
+# Seconds between tree size records
+SIZE_INTERVAL = 0.01
+# Tree size records shown by report()
+REPORT_SIZES = 6
+
+
+class PlannerProfiler:
+    def __init__(self, clock=time.perf_counter, size_interval=SIZE_INTERVAL):
+        self.clock = clock
+        self.size_interval = size_interval
+        self.reset()
+
+    def reset(self):
+        self.times = {}
+        self.calls = {}
+        self.rejections = {}
+        # (seconds since the profiler started, nodes) as the tree grows
+        self.tree_sizes = []
+        # Time spent in the phases nested in each open phase, innermost last
+        self.nested = []
+        self.started = self.clock()
+
+    # Open a phase; returns the time to hand to stop()
+    def start(self):
+        self.nested.append(0.0)
+        return self.clock()
+
+    # Close the phase opened at started and charge its own time to phase
+    def stop(self, phase, started):
+        spent = self.clock() - started
+        self.times[phase] = self.times.get(phase, 0.0) + spent - self.nested.pop()
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        if self.nested:
+            self.nested[-1] += spent
+
+    def reject(self, reason, count=1):
+        self.rejections[reason] = self.rejections.get(reason, 0) + count
+
+    # Record the tree size, at most once per size_interval unless force is set
+    def tree_size(self, size, force=False):
+        now = self.clock() - self.started
+        if force or not self.tree_sizes or now - self.tree_sizes[-1][0] >= self.size_interval:
+            self.tree_sizes.append((now, size))
+
+    # Close a plan() run opened with start(): its time outside the other phases is "other"
+    def run_finished(self, started, size):
+        self.tree_size(size, force=True)
+        self.stop("other", started)
+
+    # function, with each call charged to phase
+    def timed(self, phase, function):
+        def timed_call(*args, **kwargs):
+            started = self.start()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.stop(phase, started)
+        return timed_call
+
+    def world(self, world):
+        return ProfiledWorld(world, self)
+
+    def sampler(self, sampler):
+        return ProfiledSampler(sampler, self)
+
+    # Time the searches and dominance tests of a tree in place (trees belong to one
+    # run, unlike worlds and samplers); returns the tree
+    def tree(self, nodes):
+        if "nearest" in vars(nodes):
+            return nodes
+        for name in ("nearest", "nearest_many", "near", "k_nearest"):
+            setattr(nodes, name, self.timed("nearest", getattr(nodes, name)))
+        pareto_front = nodes.pareto_front
+
+        def profiled_front(goal):
+            front = pareto_front(goal)
+            if "dominated" not in vars(front):
+                front.dominated = self.timed("dominance", front.dominated)
+            return front
+        nodes.pareto_front = profiled_front
+        return nodes
+
+    # Phase name -> {"time", "calls", "mean", "share"}, in report order
+    def phases(self):
+        total = sum(self.times.values())
+        names = [name for name in PHASES if name in self.times]
+        names += sorted(name for name in self.times if name not in PHASES)
+        return {name: {"time": self.times[name],
+                       "calls": self.calls[name],
+                       "mean": self.times[name] / self.calls[name],
+                       "share": self.times[name] / total if total else 0.0}
+                for name in names}
+
+    # Everything recorded, as plain data (JSON-serializable)
+    def stats(self):
+        return {
+            "total": sum(self.times.values()),
+            "phases": self.phases(),
+            "rejections": dict(self.rejections),
+            "tree_sizes": [list(record) for record in self.tree_sizes],
+        }
+
+    def report(self):
+        header = "%-28s %9s %10s %9s %7s" % ("phase", "calls", "total ms", "mean us", "share")
+        lines = [header, "-" * len(header)]
+        for name, phase in self.phases().items():
+            lines.append("%-28s %9d %10.1f %9.1f %6.1f%%" % (name, phase["calls"], 1000 * phase["time"],
+                                                            1e6 * phase["mean"], 100 * phase["share"]))
+        lines.append("%-28s %9s %10.1f" % ("total", "", 1000 * sum(self.times.values())))
+        rejected = sum(self.rejections.values())
+        if rejected:
+            lines.append("rejected samples: %d (%s)" % (rejected, ", ".join(
+                "%s %d" % (reason, count) for reason, count in sorted(self.rejections.items()) if count)))
+        if self.tree_sizes:
+            # A few records spread over the run, always including the last
+            step = max(1, -(-len(self.tree_sizes) // REPORT_SIZES))
+            shown = self.tree_sizes[::step]
+            if shown[-1] is not self.tree_sizes[-1]:
+                shown.append(self.tree_sizes[-1])
+            lines.append("tree size: %s" % ", ".join("%d at %.3fs" % (size, when) for when, size in shown))
+        return "\n".join(lines)
+
+
+# A world whose collision checks are charged to the profiler; everything else is the
+# world's own. The world's internal calls bypass the wrappers, so nothing is counted twice.
+class ProfiledWorld:
+    def __init__(self, world, profiler):
+        self.world = world
+        self.in_obstacle = profiler.timed("in_obstacle", world.in_obstacle)
+        self.in_obstacle_many = profiler.timed("in_obstacle", world.in_obstacle_many)
+        self.line_intersects_obstacle = profiler.timed("line_intersects_obstacle", world.line_intersects_obstacle)
+        self.line_intersects_obstacle_many = profiler.timed("line_intersects_obstacle",
+                                                            world.line_intersects_obstacle_many)
+        self.intersects_dynamic_obstacle = profiler.timed("intersects_dynamic_obstacle",
+                                                          world.intersects_dynamic_obstacle)
+        self.intersects_dynamic_obstacle_many = profiler.timed("intersects_dynamic_obstacle",
+                                                               world.intersects_dynamic_obstacle_many)
+        self.intersects_moving_obstacle_many = profiler.timed("intersects_dynamic_obstacle",
+                                                              world.intersects_moving_obstacle_many)
+
+    def __getattr__(self, name):
+        return getattr(self.world, name)
+
+
+# A sampler whose draws are charged to the profiler
+class ProfiledSampler:
+    def __init__(self, sampler, profiler):
+        self.base = sampler
+        self.sample = profiler.timed("sample", sampler.sample)
+        self.sample_many = profiler.timed("sample", sampler.sample_many)
+
+    def __getattr__(self, name):
+        return getattr(self.base, name)
@@ -0,0 +1,142 @@
+import math
+
+import numpy as np
+
+from world import distance
+
+# Samplers choose the random points the planners steer towards. sample(rng) draws one
+# point from a random.Random (or the random module) and sample_many(np_rng, count)
+# draws an (count, 2) array from a numpy Generator. plan() reports every solution
+# cost it finds through improve(), so a sampler is stateful for the run it serves.
+
+# Share of samples that go straight to the goal
+GOAL_BIAS = 0.05
+
+
+# Uniform over the world's integer grid, as the planners have always sampled
+class UniformSampler:
+    def __init__(self, world):
+        self.world = world
+
+    def sample(self, rng):
+        return self.world.sample_point(rng)
+
+    def sample_many(self, np_rng, count):
+        return self.world.sample_points(np_rng, count)
+
+    def improve(self, cost):
+        pass
+
+
+# Return the goal itself with probability goal_bias, otherwise a sample of base. The
+# bias only speeds up the first path: once one is known, goal samples keep stepping
+# the same nodes around the goal, so they stop.
+class GoalBiasedSampler:
+    def __init__(self, base, goal, goal_bias=GOAL_BIAS):
+        self.base = base
+        self.goal = goal
+        self.goal_bias = goal_bias
+
+    def sample(self, rng):
+        if self.goal_bias and rng.random() < self.goal_bias:
+            return self.goal
+        return self.base.sample(rng)
+
+    def sample_many(self, np_rng, count):
+        points = self.base.sample_many(np_rng, count)
+        if self.goal_bias:
+            points[np_rng.random(count) < self.goal_bias] = self.goal
+        return points
+
+    def improve(self, cost):
+        self.goal_bias = 0.0
+        self.base.improve(cost)
+
+
+# Informed sampling (Gammell et al.): once a solution of cost c is known, only points x
+# with |start - x| + |x - goal| < c can lie on a cheaper one, so sample uniformly from
+# that ellipse (foci start and goal, transverse diameter c) clipped to the world.
+# Until then it defers to base; while the ellipse is larger than the world it
+# rejects the samples of base outside the ellipse instead.
+class InformedSampler:
+    def __init__(self, base, start, goal):
+        self.base = base
+        self.world = base.world
+        self.start = start
+        self.goal = goal
+        self.cost = math.inf
+        self.c_min = distance(start, goal)
+        self.centre = ((start[0] + goal[0]) / 2, (start[1] + goal[1]) / 2)
+        angle = math.atan2(goal[1] - start[1], goal[0] - start[0])
+        self.cos, self.sin = math.cos(angle), math.sin(angle)
+        self.radii = (math.inf, math.inf)
+
+    def improve(self, cost):
+        self.base.improve(cost)
+        if cost < self.cost:
+            self.cost = cost
+            self.radii = (cost / 2, math.sqrt(max(cost * cost - self.c_min * self.c_min, 0.0)) / 2)
+
+    # Sampling the ellipse pays off once it is smaller than the world
+    def focused(self):
+        return math.pi * self.radii[0] * self.radii[1] < self.world.width * self.world.height
+
+    # Works on scalars and on arrays alike
+    def in_world(self, x, y):
+        return (x >= 0) & (x <= self.world.width) & (y >= 0) & (y <= self.world.height)
+
+    # Map points of the unit disk (as (n,) arrays) into the ellipse
+    def from_disk(self, u, v):
+        u = u * self.radii[0]
+        v = v * self.radii[1]
+        return (self.centre[0] + self.cos * u - self.sin * v,
+                self.centre[1] + self.sin * u + self.cos * v)
+
+    def in_ellipse(self, x, y):
+        dx = x - self.centre[0]
+        dy = y - self.centre[1]
+        u = (self.cos * dx + self.sin * dy) / self.radii[0]
+        v = (self.cos * dy - self.sin * dx) / self.radii[1]
+        return u * u + v * v < 1
+
+    def sample(self, rng):
+        if not self.focused():
+            while True:
+                point = self.base.sample(rng)
+                if self.cost == math.inf or self.in_ellipse(*point):
+                    return point
+        while True:
+            r = math.sqrt(rng.random())
+            theta = 2 * math.pi * rng.random()
+            x, y = self.from_disk(r * math.cos(theta), r * math.sin(theta))
+            if self.in_world(x, y):
+                return (x, y)
+
+    def sample_many(self, np_rng, count):
+        if self.cost == math.inf:
+            return self.base.sample_many(np_rng, count)
+        chunks = []
+        needed = count
+        # Rejection sampling from whichever of ellipse and world is smaller
+        while needed > 0:
+            if self.focused():
+                r = np.sqrt(np_rng.random(count))
+                theta = 2 * math.pi * np_rng.random(count)
+                points = np.column_stack(self.from_disk(r * np.cos(theta), r * np.sin(theta)))
+                points = points[self.in_world(points[:, 0], points[:, 1])]
+            else:
+                points = self.base.sample_many(np_rng, count)
+                points = points[self.in_ellipse(points[:, 0], points[:, 1])]
+            chunks.append(points[:needed])
+            needed -= len(chunks[-1])
+        return np.concatenate(chunks)
+
+
+# Build the sampler for a run: uniform, optionally goal-biased, optionally informed
+def make_sampler(world, start, goal, goal_bias=0.0, informed=False):
+    sampler = UniformSampler(world)
+    if informed:
+        sampler = InformedSampler(sampler, start, goal)
+    if goal_bias:
+        sampler = GoalBiasedSampler(sampler, goal, goal_bias)
+    return sampler
@@ -0,0 +1,478 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import math
+import multiprocessing
+import os
+import signal
+import time
+
+from maps import MAPS, load_map_file, load_world, make_world, map_endpoints
+from planner import ALGORITHMS, BATCH_ALGORITHMS, plan
+
+# Planning service: an asyncio server on a loopback TCP port or a unix socket that
+# runs plan() in a process pool, for controllers that need paths without a display.
+#
+#   python service.py --port 8765 --workers 4
+#
+# Requests and responses are JSON objects, one per line, and a connection may send
+# many requests without waiting; responses come back as they finish, tagged with the
+# request's "id":
+#
+#   {"id": 1, "map": "map1", "start": [50, 550], "goal": [750, 50], "seed": 3}
+#   {"id": 1, "success": true, "path": [[50.0, 550.0], ...], "cost": 1021.4, ...}
+#
+# "map" is a map name or {"name": ..., "clearance": ..., "obstacles": [shape, ...],
+# "moving_obstacles": [[shape, velocity], ...]}, with "file": path to a map file (see
+# maps.load_map_file) in place of "name"; start and goal default to the map's.
+# Requests for the same map that queue up while the workers are busy go to one worker
+# together, which builds that map's world once and keeps it for later batches, and
+# identical requests in flight at the same time share one run. {"op": "stats"} returns
+# the service counters.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Requests admitted but not yet answered, across all connections; past this the server
+# stops reading from its sockets, so clients feel TCP backpressure instead of the queue growing
+MAX_PENDING = 256
+# Most requests for one map shipped to a worker at once
+MAX_BATCH = 8
+# Worlds each worker keeps built, least recently used dropped first
+WORLD_CACHE = 8
+# Longest request line accepted, in bytes
+MAX_LINE = 1 << 20
+# plan() options a request may set, with the service's defaults
+PLAN_DEFAULTS = {
+    "algorithm": "mod_rrt_star",
+    "budget": 10000,
+    "time_limit": 10.0,
+    "seed": None,
+    "batch_size": None,
+    "anytime": False,
+    "goal_bias": 0.0,
+    "informed": False,
+}
+
+
+# Number of values after the tag in each obstacle shape
+SHAPE_SIZES = {"rect": 4, "circle": 3}
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+# Check a numeric option: an integer if integer is set, at least minimum, and None only
+# if optional
+def as_number(value, name, integer=False, minimum=None, optional=False):
+    if value is None and optional:
+        return None
+    if not is_number(value) or (integer and not isinstance(value, int)) or (minimum is not None and value < minimum):
+        expected = "an integer" if integer else "a number"
+        if minimum is not None:
+            expected += " >= %s" % minimum
+        if optional:
+            expected += " or null"
+        raise ValueError("%s must be %s, not %r" % (name, expected, value))
+    return value
+
+
+# Check an obstacle shape, ["rect", x, y, w, h], ["circle", x, y, r] or a bare
+# [x, y, w, h] rect, and return it tagged
+def as_shape(value, name):
+    if isinstance(value, list) and value and isinstance(value[0], str):
+        kind, numbers = value[0], value[1:]
+    else:
+        kind, numbers = "rect", value
+    if (kind not in SHAPE_SIZES or not isinstance(numbers, list) or len(numbers) != SHAPE_SIZES[kind]
+            or not all(is_number(number) for number in numbers) or min(numbers[2:]) <= 0):
+        raise ValueError('%s must be ["rect", x, y, w, h] or ["circle", x, y, r] with positive sizes, not %r'
+                         % (name, value))
+    return [kind] + numbers
+
+
+def as_list(value, name):
+    if not isinstance(value, list):
+        raise ValueError("%s must be a list, not %r" % (name, value))
+    return value
+
+
+# Normalize the map part of a request to a dict, checking it names a known map or file
+# and that its clearance and obstacles are well formed, so a bad request fails on its
+# own rather than in the worker that builds the world for a whole batch
+def map_spec(spec):
+    if isinstance(spec, str):
+        spec = {"name": spec}
+    if isinstance(spec, dict) and isinstance(spec.get("file"), str) and "name" not in spec:
+        if not os.path.isfile(spec["file"]):
+            raise ValueError("no map file %r" % spec["file"])
+    elif not isinstance(spec, dict) or not isinstance(spec.get("name"), str) or spec["name"] not in MAPS:
+        raise ValueError("unknown map %r; expected one of %s or a file" % (spec, ", ".join(sorted(MAPS))))
+    unknown = set(spec) - {"name", "file", "clearance", "obstacles", "moving_obstacles"}
+    if unknown:
+        raise ValueError("unknown map fields: %s" % ", ".join(sorted(unknown)))
+    spec = dict(spec)
+    if "clearance" in spec:
+        as_number(spec["clearance"], "clearance", minimum=0, optional=True)
+    if "obstacles" in spec:
+        spec["obstacles"] = [as_shape(obstacle, "obstacle") for obstacle in as_list(spec["obstacles"], "obstacles")]
+    if "moving_obstacles" in spec:
+        moving = []
+        for obstacle in as_list(spec["moving_obstacles"], "moving_obstacles"):
+            if not isinstance(obstacle, list) or len(obstacle) != 2:
+                raise ValueError("moving obstacle must be [shape, [vx, vy]], not %r" % (obstacle,))
+            moving.append([as_shape(obstacle[0], "moving obstacle shape"),
+                           list(as_point(obstacle[1], "moving obstacle velocity"))])
+        spec["moving_obstacles"] = moving
+    return spec
+
+
+def spec_world(spec):
+    if "file" in spec:
+        world = load_world(spec["file"], spec.get("clearance"))
+    else:
+        world = make_world(spec["name"], spec.get("clearance"))
+    for obstacle in spec.get("obstacles", ()):
+        world.add_dynamic_obstacle(tuple(obstacle))
+    for shape, velocity in spec.get("moving_obstacles", ()):
+        world.add_moving_obstacle(tuple(shape), tuple(velocity))
+    return world
+
+
+def as_point(value, name):
+    if not isinstance(value, (list, tuple)) or len(value) != 2 or not all(is_number(v) for v in value):
+        raise ValueError("%s must be [x, y], not %r" % (name, value))
+    return (float(value[0]), float(value[1]))
+
+
+# Split a request into (map key, map spec, start, goal, plan options), raising
+# ValueError for anything plan() should not see. Reads no files: start and goal are
+# None where they are to come from a map file (see PlanningService.map_file).
+def parse_request(request):
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    spec = map_spec(request.get("map"))
+    start, goal = (None, None) if "file" in spec else map_endpoints(spec["name"])
+    if "start" in request or start is not None:
+        start = as_point(request.get("start", start), "start")
+    if "goal" in request or goal is not None:
+        goal = as_point(request.get("goal", goal), "goal")
+    options = dict(PLAN_DEFAULTS)
+    for name in set(request) - {"id", "map", "start", "goal"}:
+        if name not in PLAN_DEFAULTS:
+            raise ValueError("unknown request field %r" % name)
+        options[name] = request[name]
+    if not isinstance(options["algorithm"], str) or options["algorithm"] not in ALGORITHMS:
+        raise ValueError("unknown algorithm %r" % options["algorithm"])
+    as_number(options["budget"], "budget", integer=True, minimum=0)
+    as_number(options["time_limit"], "time_limit", minimum=0, optional=True)
+    as_number(options["seed"], "seed", integer=True, minimum=0, optional=True)
+    as_number(options["batch_size"], "batch_size", integer=True, minimum=0, optional=True)
+    as_number(options["goal_bias"], "goal_bias", minimum=0)
+    if options["goal_bias"] > 1:
+        raise ValueError("goal_bias must be at most 1, not %r" % options["goal_bias"])
+    for name in ("anytime", "informed"):
+        if not isinstance(options[name], bool):
+            raise ValueError("%s must be true or false, not %r" % (name, options[name]))
+    if options["batch_size"] and options["algorithm"] not in BATCH_ALGORITHMS:
+        raise ValueError("%s has no batched expander" % options["algorithm"])
+    return json.dumps(spec, sort_keys=True), spec, start, goal, options
+
+
+# Per-process worlds, keyed by the canonical JSON of their map spec
+_worlds = collections.OrderedDict()
+
+
+# Ctrl+C reaches the whole process group; the server shuts the pool down itself
+def _init_worker():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _world(key, spec):
+    world = _worlds.get(key)
+    if world is None:
+        world = _worlds[key] = spec_world(spec)
+        if len(_worlds) > WORLD_CACHE:
+            _worlds.popitem(last=False)
+    else:
+        _worlds.move_to_end(key)
+    return world
+
+
+# Run one batch in a worker: every job plans on the same world. Only the path and
+# metrics travel back, not the tree.
+def _plan_batch(key, spec, jobs):
+    world = _world(key, spec)
+    responses = []
+    for start, goal, options in jobs:
+        try:
+            result = plan(world, start, goal, **options)
+        except Exception as error:
+            responses.append({"success": False, "error": "%s: %s" % (type(error).__name__, error)})
+            continue
+        responses.append({
+            "success": result.success,
+            "path": [list(point) for point in result.path],
+            # JSON has no infinity; failed runs have no cost
+            "cost": result.cost if math.isfinite(result.cost) else None,
+            "iterations": result.iterations,
+            "restarts": result.restarts,
+            "tree_nodes": result.nodes.node_count(),
+            "path_nodes": len(result.path),
+            "elapsed": result.elapsed,
+            "seed": result.seed,
+        })
+    return responses
+
+
+# One admitted request waiting for its batch
+class Job:
+    def __init__(self, start, goal, options, future):
+        self.start = start
+        self.goal = goal
+        self.options = options
+        self.future = future
+        self.admitted = time.perf_counter()
+
+
+# Queues requests per map and feeds them to the pool. One batch per worker is in
+# flight at a time, so while all workers are busy the queues fill up and the next
+# batch for a map takes what arrived for it in the meantime, up to its share per
+# worker: batches only grow as the load does.
+class PlanningService:
+    def __init__(self, workers=None, max_pending=MAX_PENDING, max_batch=MAX_BATCH, executor=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        # Any concurrent.futures executor works; by default a process pool is made on start()
+        self.executor = executor
+        self.own_executor = executor is None
+        # map key -> (spec, deque of jobs), oldest map first
+        self.queues = collections.OrderedDict()
+        # (map key, start, goal, options) -> future of the run serving all such requests
+        self.in_flight = {}
+        self.counters = collections.Counter()
+        # Map file path -> (modification time, settings), for the endpoints of file maps
+        self.map_files = {}
+        # Requests admitted and not yet answered
+        self.pending = 0
+        self.dispatcher = None
+
+    async def start(self):
+        if self.executor is None:
+            # Not forked: the pool starts workers on demand, and a forked one would hold
+            # on to every connection open at the time, so closing them would not end them
+            self.executor = concurrent.futures.ProcessPoolExecutor(self.workers,
+                                                                   mp_context=multiprocessing.get_context("spawn"),
+                                                                   initializer=_init_worker)
+        self.admission = asyncio.Semaphore(self.max_pending)
+        self.idle = asyncio.Semaphore(self.workers)
+        self.wakeup = asyncio.Event()
+        self.dispatcher = asyncio.create_task(self.dispatch())
+
+    async def close(self):
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+            self.dispatcher = None
+        for spec, jobs in self.queues.values():
+            for job in jobs:
+                job.future.cancel()
+        self.queues.clear()
+        if self.own_executor and self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # Settings of a map file, read in a thread rather than on the event loop and kept
+    # until the file changes
+    async def map_file(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError as error:
+            raise ValueError("cannot read map file %r: %s" % (path, error))
+        cached = self.map_files.get(path)
+        if cached is None or cached[0] != mtime:
+            settings = await asyncio.get_running_loop().run_in_executor(None, load_map_file, path)
+            cached = self.map_files[path] = (mtime, settings)
+        return cached[1]
+
+    # Plan one request (a dict) and return the response dict, without the id
+    async def submit(self, request):
+        key, spec, start, goal, options = parse_request(request)
+        if start is None or goal is None:
+            settings = await self.map_file(spec["file"])
+            start = as_point(settings["start"], "start") if start is None else start
+            goal = as_point(settings["goal"], "goal") if goal is None else goal
+        self.counters["requests"] += 1
+        request_key = (key, start, goal, json.dumps(options, sort_keys=True))
+        future = self.in_flight.get(request_key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.in_flight[request_key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(request_key, None))
+            self.queues.setdefault(key, (spec, collections.deque()))[1].append(Job(start, goal, options, future))
+            self.wakeup.set()
+        else:
+            self.counters["coalesced"] += 1
+        # A waiter that goes away must not cancel the run for the others
+        return dict(await asyncio.shield(future))
+
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.queues:
+                await self.idle.acquire()
+                key, (spec, queue) = next(iter(self.queues.items()))
+                # Split the queue between the workers rather than queueing it all behind one
+                size = min(self.max_batch, -(-len(queue) // self.workers))
+                jobs = [queue.popleft() for _ in range(size)]
+                if queue:
+                    # Round robin between maps
+                    self.queues.move_to_end(key)
+                else:
+                    del self.queues[key]
+                self.counters["batches"] += 1
+                dispatched = time.perf_counter()
+                task = loop.run_in_executor(self.executor, _plan_batch, key, spec,
+                                            [(job.start, job.goal, job.options) for job in jobs])
+                task.add_done_callback(lambda task, jobs=jobs, dispatched=dispatched:
+                                       self.finish(task, jobs, dispatched))
+
+    def finish(self, task, jobs, dispatched):
+        self.idle.release()
+        if task.cancelled():
+            error = "cancelled"
+        elif task.exception() is not None:
+            error = "%s: %s" % (type(task.exception()).__name__, task.exception())
+        else:
+            error = None
+        responses = task.result() if error is None else [{"success": False, "error": error}] * len(jobs)
+        for job, response in zip(jobs, responses):
+            if job.future.done():
+                continue
+            response = dict(response, batch=len(jobs), queued=dispatched - job.admitted,
+                            latency=time.perf_counter() - job.admitted)
+            job.future.set_result(response)
+
+    def release(self):
+        self.pending -= 1
+        self.admission.release()
+
+    def stats(self):
+        return dict(self.counters, pending=self.pending,
+                    queued=sum(len(queue) for spec, queue in self.queues.values()), workers=self.workers)
+
+    # Serve one connection: read request lines, answer each as soon as it is planned
+    async def handle(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # Line over MAX_LINE, or the client went away
+                    break
+                if not line:
+                    break
+                # Backpressure: until a request is admitted, the next line is not read
+                await self.admission.acquire()
+                self.pending += 1
+                task = asyncio.create_task(self.respond(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def respond(self, line, writer, lock):
+        request = None
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict) and request.get("op") == "stats":
+                response = self.stats()
+            else:
+                response = await self.submit(request)
+        except ValueError as error:
+            response = {"success": False, "error": str(error)}
+        except Exception as error:
+            # Whatever went wrong, the client gets an answer rather than waiting forever
+            response = {"success": False, "error": "%s: %s" % (type(error).__name__, error)}
+        finally:
+            self.release()
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        async with lock:
+            try:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+
+# Run the service until cancelled, on a unix socket if path is given, else on host:port
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, path=None, workers=None, max_pending=MAX_PENDING,
+                max_batch=MAX_BATCH):
+    async with PlanningService(workers, max_pending, max_batch) as service:
+        if path:
+            server = await asyncio.start_unix_server(service.handle, path, limit=MAX_LINE)
+        else:
+            server = await asyncio.start_server(service.handle, host, port, limit=MAX_LINE)
+        async with server:
+            await server.serve_forever()
+
+
+# Minimal client: send the requests over one connection and return the responses in
+# request order. Requests without an id get their index as one.
+async def request_plans(requests, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path, limit=MAX_LINE)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    requests = [dict(request, id=request.get("id", i)) for i, request in enumerate(requests)]
+    try:
+        for request in requests:
+            writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        responses = {}
+        while len(responses) < len(requests):
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("service closed the connection")
+            response = json.loads(line)
+            responses[response.get("id")] = response
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return [responses[request["id"]] for request in requests]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve plan() over a local socket.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="listen on this unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="planner processes (default: one per CPU)")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING,
+                        help="requests admitted at once before the server stops reading")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH,
+                        help="most requests for one map run by a worker in one go")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.max_pending, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+import heapq
+import math
+
+from occupancy import obstacle_bounds
+
+# Entries are stored as [x, y, item, left, right]; the split axis alternates with depth.
+# Keys on the left of a node are <= its key and keys on the right >= it, so points equal
+# on the split axis (duplicates in particular) may sit on either side.
+X, Y, ITEM, LEFT, RIGHT = range(5)
+# Side of an ObstacleGrid cell, in map units
+OBSTACLE_CELL_SIZE = 64
+
+
+# Incremental 2-d tree for nearest-neighbour and radius queries over tree nodes.
+# Inserts descend a single branch; the tree is rebuilt balanced whenever it grows
+# much deeper than log2(size), which keeps queries close to O(log n). Removed entries
+# stay in place as tombstones (their item set to None), which queries pass through
+# but never return, until they outnumber the live ones and the tree is rebuilt.
+class KDTree:
+    def __init__(self, entries=()):
+        self.root = None
+        self.size = 0
+        # Tombstones left by remove()
+        self.removed = 0
+        self.depth = 0
+        # Depth right after the last rebuild
+        self.built_depth = 0
+        self.rebuild(entries)
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, point, item):
+        entry = [point[0], point[1], item, None, None]
+        self.size += 1
+        if self.root is None:
+            self.root = entry
+            self.depth = 1
+            return
+
+        node = self.root
+        depth = 0
+        while True:
+            axis = depth & 1
+            side = LEFT if entry[axis] < node[axis] else RIGHT
+            depth += 1
+            if node[side] is None:
+                node[side] = entry
+                break
+            node = node[side]
+
+        if depth + 1 > self.depth:
+            self.depth = depth + 1
+            limit = max(2 * math.log2(self.size) + 8, 2 * self.built_depth)
+            if self.size > 64 and self.depth > limit:
+                self.rebuild(self.entries())
+
+    # Remove item, inserted at point; returns whether it was found
+    def remove(self, point, item):
+        px, py = point
+        stack = [(self.root, 0)] if self.root is not None else []
+        while stack:
+            node, depth = stack.pop()
+            if node[ITEM] == item and node[X] == px and node[Y] == py:
+                node[ITEM] = None
+                self.size -= 1
+                self.removed += 1
+                if self.removed > self.size:
+                    self.rebuild(self.entries())
+                return True
+            # Keys equal on the split axis may sit on either side
+            diff = (px - node[X]) if depth & 1 == 0 else (py - node[Y])
+            if node[LEFT] is not None and diff <= 0:
+                stack.append((node[LEFT], depth + 1))
+            if node[RIGHT] is not None and diff >= 0:
+                stack.append((node[RIGHT], depth + 1))
+        return False
+
+    # Return (point, item) pairs for everything in the index
+    def entries(self):
+        result = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            if node[ITEM] is not None:
+                result.append(((node[X], node[Y]), node[ITEM]))
+            if node[LEFT] is not None:
+                stack.append(node[LEFT])
+            if node[RIGHT] is not None:
+                stack.append(node[RIGHT])
+        return result
+
+    # Replace the contents with a balanced tree built from (point, item) pairs
+    def rebuild(self, entries):
+        entries = [[point[0], point[1], item, None, None] for point, item in entries]
+        self.size = len(entries)
+        self.removed = 0
+        self.depth = 0
+        self.root = self._build(entries, 0)
+        self.built_depth = self.depth
+
+    def _build(self, entries, depth):
+        if not entries:
+            return None
+        self.depth = max(self.depth, depth + 1)
+        axis = depth & 1
+        entries.sort(key=lambda entry: entry[axis])
+        # Split at the true median even inside a run of equal keys, so duplicates are
+        # halved like any other points and the depth stays log2(n)
+        median = len(entries) // 2
+        node = entries[median]
+        node[LEFT] = self._build(entries[:median], depth + 1)
+        node[RIGHT] = self._build(entries[median + 1:], depth + 1)
+        return node
+
+    # Return the item closest to a point, or None if the index is empty
+    def nearest(self, point):
+        px, py = point
+        best = None
+        best_d2 = math.inf
+        stack = [(self.root, 0, 0.0)] if self.root is not None else []
+        while stack:
+            node, depth, bound = stack.pop()
+            if bound >= best_d2:
+                continue
+            # Descend the near side directly and defer the far side to the stack
+            while node is not None:
+                dx = node[X] - px
+                dy = node[Y] - py
+                d2 = dx * dx + dy * dy
+                if d2 < best_d2 and node[ITEM] is not None:
+                    best_d2 = d2
+                    best = node[ITEM]
+
+                diff = -dx if depth & 1 == 0 else -dy
+                if diff < 0:
+                    near, far = node[LEFT], node[RIGHT]
+                else:
+                    near, far = node[RIGHT], node[LEFT]
+                if far is not None and diff * diff < best_d2:
+                    stack.append((far, depth + 1, diff * diff))
+                node = near
+                depth += 1
+        return best
+
+    # Return the k items closest to a point, nearest first
+    def k_nearest(self, point, k):
+        px, py = point
+        # Max-heap of the best k so far, as (-d2, tiebreak, item)
+        best = []
+        stack = [(self.root, 0, 0.0)] if self.root is not None and k > 0 else []
+        while stack:
+            node, depth, bound = stack.pop()
+            if len(best) == k and bound >= -best[0][0]:
+                continue
+            while node is not None:
+                dx = node[X] - px
+                dy = node[Y] - py
+                d2 = dx * dx + dy * dy
+                if node[ITEM] is not None:
+                    if len(best) < k:
+                        heapq.heappush(best, (-d2, id(node), node[ITEM]))
+                    elif d2 < -best[0][0]:
+                        heapq.heapreplace(best, (-d2, id(node), node[ITEM]))
+
+                diff = -dx if depth & 1 == 0 else -dy
+                if diff < 0:
+                    near, far = node[LEFT], node[RIGHT]
+                else:
+                    near, far = node[RIGHT], node[LEFT]
+                if far is not None and (len(best) < k or diff * diff < -best[0][0]):
+                    stack.append((far, depth + 1, diff * diff))
+                node = near
+                depth += 1
+        return [item for _, _, item in sorted(best, reverse=True)]
+
+    # Return all items within radius of a point
+    def within(self, point, radius):
+        px, py = point
+        r2 = radius * radius
+        result = []
+        stack = [(self.root, 0)] if self.root is not None else []
+        while stack:
+            node, depth = stack.pop()
+            dx = node[X] - px
+            dy = node[Y] - py
+            if dx * dx + dy * dy <= r2 and node[ITEM] is not None:
+                result.append(node[ITEM])
+
+            diff = (px - node[X]) if depth & 1 == 0 else (py - node[Y])
+            if node[LEFT] is not None and diff - radius <= 0:
+                stack.append((node[LEFT], depth + 1))
+            if node[RIGHT] is not None and diff + radius >= 0:
+                stack.append((node[RIGHT], depth + 1))
+        return result
+
+
+# Broad phase for obstacle collision checks: a uniform grid of buckets, each holding
+# the obstacles whose bounding box overlaps that cell. A segment query walks only the
+# cells the segment passes through, so exact tests run against nearby obstacles only.
+class ObstacleGrid:
+    def __init__(self, obstacles=(), cell_size=OBSTACLE_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.obstacles = []
+        for obs in obstacles:
+            self.insert(obs)
+
+    def __len__(self):
+        return len(self.obstacles)
+
+    # Cells overlapped by the box (x0, y0) - (x1, y1), bounds included
+    def box_cells(self, x0, y0, x1, y1):
+        size = self.cell_size
+        return [(cx, cy)
+                for cx in range(math.floor(x0 / size), math.floor(x1 / size) + 1)
+                for cy in range(math.floor(y0 / size), math.floor(y1 / size) + 1)]
+
+    def insert(self, obs):
+        self.obstacles.append(obs)
+        for cell in self.box_cells(*obstacle_bounds(obs)):
+            self.cells.setdefault(cell, []).append(obs)
+
+    def remove(self, obs):
+        self.obstacles.remove(obs)
+        for cell in self.box_cells(*obstacle_bounds(obs)):
+            bucket = self.cells[cell]
+            bucket.remove(obs)
+            if not bucket:
+                del self.cells[cell]
+
+    def clear(self):
+        self.cells = {}
+        self.obstacles = []
+
+    # Cells a segment passes through, found by stepping from cell border to cell border
+    # along it (Amanatides & Woo)
+    def segment_cells(self, point1, point2):
+        size = self.cell_size
+        x1, y1 = point1[0] / size, point1[1] / size
+        x2, y2 = point2[0] / size, point2[1] / size
+        cx, cy = math.floor(x1), math.floor(y1)
+        dx, dy = x2 - x1, y2 - y1
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        # Segment parameter at the next vertical and horizontal border, and per cell
+        next_x = (cx + (step_x > 0) - x1) / dx if dx else math.inf
+        next_y = (cy + (step_y > 0) - y1) / dy if dy else math.inf
+        delta_x = abs(1 / dx) if dx else math.inf
+        delta_y = abs(1 / dy) if dy else math.inf
+
+        # Count the steps down per axis, so rounding can never walk past the end cell
+        steps_x = abs(math.floor(x2) - cx)
+        steps_y = abs(math.floor(y2) - cy)
+        cells = [(cx, cy)]
+        while steps_x or steps_y:
+            if steps_x and (next_x < next_y or not steps_y):
+                cx += step_x
+                next_x += delta_x
+                steps_x -= 1
+            else:
+                cy += step_y
+                next_y += delta_y
+                steps_y -= 1
+            cells.append((cx, cy))
+        return cells
+
+    # Obstacles whose bounding box may touch the segment, each listed once
+    def segment_candidates(self, point1, point2):
+        return self.gather(self.segment_cells(point1, point2))
+
+    # Obstacles whose bounding box may overlap the box (x0, y0) - (x1, y1), each listed once
+    def box_candidates(self, x0, y0, x1, y1):
+        return self.gather(self.box_cells(x0, y0, x1, y1))
+
+    # Obstacles whose bounding box may lie within radius of a point, each listed once
+    def point_candidates(self, point, radius=0):
+        x, y = point
+        return self.box_candidates(x - radius, y - radius, x + radius, y + radius)
+
+    def gather(self, cells):
+        found = {}
+        for cell in cells:
+            for obs in self.cells.get(cell, ()):
+                found[id(obs)] = obs
+        return list(found.values())
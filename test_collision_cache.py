@@ -0,0 +1,65 @@
+import random
+
+from collision_cache import MAX_CHANGES, CollisionCache
+from maps import random_dynamic_obstacle
+from world import World
+
+
+def test_changes_invalidate_only_overlapping_entries():
+    cache = CollisionCache()
+    near = cache.point_key("point", (100, 100))
+    far = cache.point_key("point", (500, 500))
+    blocked = cache.point_key("point", (300, 300))
+    cache.put(near, False, (90, 90, 110, 110))
+    cache.put(far, False, (490, 490, 510, 510))
+    cache.put(blocked, True, (290, 290, 310, 310))
+
+    # A new obstacle can only block: it drops the free entry under it and nothing else
+    cache.obstacle_changed((95, 95, 130, 130), True)
+    cache.obstacle_changed((280, 280, 320, 320), True)
+    assert cache.get(near) is None
+    assert cache.get(far) is False
+    assert cache.get(blocked) is True
+    # A removed one can only free: it drops the blocked entry under it
+    cache.obstacle_changed((280, 280, 320, 320), False)
+    assert cache.get(blocked) is None
+    assert cache.get(far) is False
+    assert cache.invalidations == 2
+
+    # Entries older than the remembered changes are dropped whatever they overlap
+    for _ in range(MAX_CHANGES + 1):
+        cache.obstacle_changed((0, 0, 1, 1), True)
+    cache.put(near, False, (90, 90, 110, 110))
+    assert cache.get(far) is None
+    assert cache.get(near) is False
+    cache.clear()
+    assert cache.get(near) is None and len(cache) == 0
+
+
+# A cached world answers every query as an uncached one does while dynamic obstacles
+# come and go, and the cache is actually used along the way
+def test_cached_world_matches_uncached_world():
+    rng = random.Random(11)
+    static = [("rect", 300, 200, 100, 100), ("circle", 600, 150, 60)]
+    cached = World(static, cache_size=4096)
+    plain = World(static)
+    points = [(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(300)]
+    segments = [(points[i], points[(i + 1) % len(points)]) for i in range(len(points))]
+    added = []
+    for step in range(60):
+        if added and rng.random() < 0.4:
+            obstacle = added.pop(rng.randrange(len(added)))
+            cached.remove_dynamic_obstacle(obstacle)
+            plain.remove_dynamic_obstacle(obstacle)
+        else:
+            obstacle = random_dynamic_obstacle(rng)
+            added.append(cached.add_dynamic_obstacle(obstacle))
+            plain.add_dynamic_obstacle(obstacle)
+        for point in rng.sample(points, 60):
+            assert cached.in_obstacle(point) == plain.in_obstacle(point)
+        for point1, point2 in rng.sample(segments, 60):
+            assert cached.line_intersects_obstacle(point1, point2) == plain.line_intersects_obstacle(point1, point2)
+            assert (cached.intersects_dynamic_obstacle(point1, point2)
+                    == plain.intersects_dynamic_obstacle(point1, point2))
+    stats = cached.cache.stats()
+    assert stats["hits"] > 0 and stats["invalidations"] > 0
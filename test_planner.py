@@ -0,0 +1,136 @@
+import random
+
+import numpy as np
+import pytest
+
+from maps import make_world, map_endpoints
+from pareto import ParetoFront
+from planner import PlannerObserver, dynamic_rrt_batch, near_radius, plan, repair_tree
+from tree import NO_PARENT, Tree
+from world import point_in_obstacle, segments_intersect
+
+
+# Edges of a tree (child, parent) that cross a static obstacle
+def static_crossings(world, nodes):
+    children, parents = nodes.edges()
+    return int(segments_intersect(children, parents, world.static_obstacles).sum())
+
+
+# Without clearance, only the edge checks keep the tree off the static obstacles: node
+# checks alone let edges cut across the corners of map1's rects
+def test_edges_miss_static_obstacles():
+    world = make_world("map1", clearance=0, cache_dir=None)
+    start, goal = map_endpoints("map1")
+    for algorithm, batch_size in (("mod_rrt_star", None), ("dynamic_rrt", None), ("extend_rrt_star", None),
+                                  ("bidirectional_mod_rrt_star", None), ("mod_rrt_star", 64), ("dynamic_rrt", 64)):
+        for seed in range(20):
+            result = plan(world, start, goal, budget=3000, algorithm=algorithm, seed=seed, batch_size=batch_size)
+            assert result.success
+            path = np.array(result.path)
+            assert not segments_intersect(path[:-1], path[1:], world.static_obstacles).any()
+            assert static_crossings(world, result.nodes) == 0
+
+
+# Each edge costs its length, and the dominance front is the one built from scratch
+def check_costs(nodes, goal):
+    children = np.flatnonzero(nodes.parents[:len(nodes)] != NO_PARENT)
+    parents = nodes.parents[children]
+    lengths = np.hypot(*(nodes.points[children] - nodes.points[parents]).T)
+    assert np.allclose(nodes.costs[children], nodes.costs[parents] + lengths)
+    if nodes.front is not None:
+        fresh = ParetoFront(goal)
+        for cost, point in zip(nodes.costs[:len(nodes)].tolist(), nodes.points[:len(nodes)].tolist()):
+            fresh.insert(cost, fresh.goal_distance(point))
+        assert nodes.front.costs == pytest.approx(fresh.costs)
+        assert nodes.front.distances == pytest.approx(fresh.distances)
+
+
+class CostChecker(PlannerObserver):
+    def __init__(self, goal):
+        self.goal = goal
+        self.improvements = 0
+
+    def path_improved(self, result):
+        self.improvements += 1
+        check_costs(result.nodes, self.goal)
+        # Later grafts join the copies made by earlier ones
+        assert sum(point == self.goal for point in map(tuple, result.nodes.points[:len(result.nodes)].tolist())) == 1
+
+
+# Grafts that join an earlier copy move it, with everything below it, onto a cheaper
+# branch; costs below it drop, and the front has to follow
+def test_bidirectional_joins_keep_costs_consistent():
+    for name, seed in (("map2", 3), ("map2", 0)):
+        world = make_world(name, cache_dir=None)
+        start, goal = map_endpoints(name)
+        checker = CostChecker(goal)
+        result = plan(world, start, goal, budget=150, algorithm="bidirectional_mod_rrt_star", seed=seed,
+                      anytime=True, observer=checker)
+        assert checker.improvements >= 2
+        check_costs(result.nodes, goal)
+        assert static_crossings(world, result.nodes) == 0
+
+
+# With long steps the RRT* neighbourhood grows past NEAR_RADIUS, so choose-parent and
+# rewiring link nodes much further apart than a step; those edges are checked too
+def test_long_rewire_edges_miss_static_obstacles():
+    world = make_world("map1", clearance=0, cache_dir=None)
+    start, goal = map_endpoints("map1")
+    step_size = 100
+    for seed in range(3):
+        result = plan(world, start, goal, budget=400, algorithm="extend_rrt_star", seed=seed, step_size=step_size,
+                      anytime=True)
+        children, parents = result.nodes.edges()
+        assert (np.hypot(*(children - parents).T) > near_radius() + step_size).any()
+        assert static_crossings(world, result.nodes) == 0
+
+
+# The sibling lists and the k-d tree agree with the parents array: every node that is
+# left is reachable from the root and indexed, and nothing else is
+def check_structure(nodes):
+    alive = np.flatnonzero(nodes.alive())
+    assert sorted(nodes.subtree(0)) == alive.tolist()
+    assert len(nodes.index) == len(alive) == nodes.node_count()
+    assert sorted(item for _, item in nodes.index.entries()) == alive.tolist()
+
+
+def test_repair_leaves_no_node_or_edge_in_obstacles():
+    rng = random.Random(4)
+    world = make_world("map2", cache_dir=None)
+    start, goal = map_endpoints("map2")
+    nodes = Tree(start)
+    np_rng = np.random.default_rng(4)
+    while len(nodes) < 4000:
+        dynamic_rrt_batch(nodes, world, goal, np_rng, batch_size=256)
+    generation = nodes.generation
+    for _ in range(25):
+        # Centred on a node, so that every repair has something to do
+        x, y = nodes.point(rng.choice(np.flatnonzero(nodes.alive())[1:].tolist()))
+        obstacle = rng.choice([("rect", x - 15, y - 10, 30, 20), ("circle", x, y, 12)])
+        if point_in_obstacle(start, obstacle, world.clearance):
+            continue
+        world.add_dynamic_obstacle(obstacle)
+        size = nodes.node_count()
+        removed = repair_tree(nodes, world, [obstacle])
+        assert nodes.node_count() == size - removed
+
+        alive = nodes.alive()
+        assert not world.in_obstacle_many(nodes.points[:len(nodes)][alive]).any()
+        children, parents = nodes.edges()
+        assert not world.line_intersects_obstacle_many(children, parents).any()
+        check_costs(nodes, goal)
+        check_structure(nodes)
+        nearest = nodes.nearest_many(np_rng.uniform(0, 600, (50, 2)))
+        assert alive[nearest].all()
+    # Enough was removed along the way for the tree to be compacted
+    assert nodes.generation > generation
+
+
+def test_unsupported_batching_names_the_batched_algorithms():
+    world = make_world("map1", cache_dir=None)
+    start, goal = map_endpoints("map1")
+    for algorithm in ("extend_rrt_star", "bidirectional_mod_rrt_star"):
+        with pytest.raises(ValueError, match="mod_rrt_star"):
+            plan(world, start, goal, budget=10, algorithm=algorithm, batch_size=8)
+    with pytest.raises(ValueError, match="unknown algorithm"):
+        plan(world, start, goal, budget=10, algorithm="rrt")
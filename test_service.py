@@ -0,0 +1,43 @@
+import pytest
+
+from service import parse_request, spec_world
+
+
+# Each malformed request must fail parsing with its own ValueError, before a worker
+# builds a world for a whole batch of requests
+@pytest.mark.parametrize("request_fields", [
+    {"map": {"name": "map1", "obstacles": 5}},
+    {"map": {"name": "map1", "obstacles": [["tri", 1, 2]]}},
+    {"map": {"name": "map1", "obstacles": [["circle", 1, 2]]}},
+    {"map": {"name": "map1", "obstacles": [["rect", 1, 2, "3", 4]]}},
+    {"map": {"name": "map1", "obstacles": [["circle", 1, 2, 0]]}},
+    {"map": {"name": "map1", "moving_obstacles": [["circle", 1, 2, 3]]}},
+    {"map": {"name": "map1", "moving_obstacles": [[["circle", 1, 2, 3], [1]]]}},
+    {"map": {"name": "map1", "clearance": "wide"}},
+    {"budget": "abc"},
+    {"budget": 1.5},
+    {"budget": True},
+    {"time_limit": "1"},
+    {"time_limit": float("nan")},
+    {"batch_size": 2.0},
+    {"seed": -1},
+    {"goal_bias": 2},
+    {"anytime": 1},
+    {"start": [1, "2"]},
+])
+def test_malformed_requests_raise_value_error(request_fields):
+    request = dict({"map": "map1"}, **request_fields)
+    with pytest.raises(ValueError):
+        parse_request(request)
+
+
+def test_well_formed_shapes_build_a_world():
+    request = {"map": {"name": "map1", "clearance": 0,
+                       "obstacles": [[100, 100, 20, 20], ["circle", 300, 300, 15]],
+                       "moving_obstacles": [[["rect", 500, 100, 10, 10], [0.1, 0]]]},
+               "budget": 100, "time_limit": None, "batch_size": 8}
+    _, spec, _, _, options = parse_request(request)
+    assert spec["obstacles"][0] == ["rect", 100, 100, 20, 20]
+    world = spec_world(spec)
+    assert world.in_obstacle((110, 110)) and world.in_obstacle((300, 300))
+    assert options["budget"] == 100 and options["batch_size"] == 8
@@ -0,0 +1,70 @@
+import math
+import random
+
+from spatial_index import KDTree
+
+
+# Many copies of one point used to build a chain one level per copy, which made
+# queries O(n) and overflowed the stack on rebuild
+def test_duplicate_points_stay_balanced():
+    index = KDTree()
+    for i in range(5000):
+        index.insert((100.0, 200.0), i)
+    index.rebuild(index.entries())
+    assert len(index) == 5000
+    assert index.depth <= 2 * math.log2(len(index)) + 8
+    assert index.nearest((100.0, 200.0)) is not None
+    assert sorted(index.within((100.0, 200.0), 0.0)) == list(range(5000))
+    assert len(index.k_nearest((0.0, 0.0), 10)) == 10
+
+
+# Queries over points sharing coordinates agree with brute force
+def test_queries_with_ties_match_brute_force():
+    rng = random.Random(3)
+    points = [(float(rng.randint(0, 5)), float(rng.randint(0, 5))) for _ in range(2000)]
+    index = KDTree()
+    for i, point in enumerate(points[:1000]):
+        index.insert(point, i)
+    index.rebuild(index.entries())
+    for i, point in enumerate(points[1000:], 1000):
+        index.insert(point, i)
+
+    for _ in range(200):
+        query = (rng.uniform(-1, 6), rng.uniform(-1, 6))
+        distances = [math.dist(query, point) for point in points]
+        assert distances[index.nearest(query)] == min(distances)
+        radius = rng.choice([0.0, 1.0, 2.0, 2.5])
+        expected = [i for i, d in enumerate(distances) if d <= radius]
+        assert sorted(index.within(query, radius)) == expected
+        found = index.k_nearest(query, 7)
+        assert sorted(distances[i] for i in found) == sorted(distances)[:7]
+    # Integer queries land exactly on split keys
+    for x in range(6):
+        for y in range(6):
+            expected = [i for i, point in enumerate(points) if math.dist((x, y), point) <= 1.0]
+            assert sorted(index.within((x, y), 1.0)) == expected
+
+
+# Removed entries stay behind as tombstones, which no query may return
+def test_removed_entries_are_never_returned():
+    rng = random.Random(5)
+    points = [(float(rng.randint(0, 20)), float(rng.randint(0, 20))) for _ in range(1500)]
+    index = KDTree(zip(points[:1000], range(1000)))
+    for i, point in enumerate(points[1000:], 1000):
+        index.insert(point, i)
+    live = set(range(len(points)))
+    for i in rng.sample(range(len(points)), 1000):
+        assert index.remove(points[i], i)
+        live.discard(i)
+        assert len(index) == len(live)
+    assert not index.remove(points[i], i)
+    assert sorted(item for _, item in index.entries()) == sorted(live)
+
+    for _ in range(200):
+        query = (rng.uniform(-1, 21), rng.uniform(-1, 21))
+        distances = {i: math.dist(query, points[i]) for i in live}
+        assert distances[index.nearest(query)] == min(distances.values())
+        expected = sorted(i for i, d in distances.items() if d <= 3.0)
+        assert sorted(index.within(query, 3.0)) == expected
+        found = index.k_nearest(query, 5)
+        assert sorted(distances[i] for i in found) == sorted(distances.values())[:5]
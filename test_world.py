@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+
+from occupancy import TiledDistanceGrid
+from planner import plan
+from world import STATIC_REACH, World, segments_intersect
+
+# Beyond occupancy.DENSE_CELL_LIMIT cells, so both grids are tiled
+LARGE = 6000
+
+
+def random_obstacles(rng, count, size):
+    obstacles = []
+    for _ in range(count):
+        x, y = rng.uniform(0, size), rng.uniform(0, size)
+        if rng.random() < 0.5:
+            obstacles.append(("circle", x, y, rng.uniform(5, 200)))
+        else:
+            obstacles.append(("rect", x, y, rng.uniform(2, 400), rng.uniform(2, 400)))
+    return obstacles
+
+
+# Point checks through the tiled grids give the exact answer, for clearances on both
+# sides of STATIC_REACH and with dynamic obstacles coming and going
+def test_tiled_grid_matches_exact_check():
+    rng = random.Random(7)
+    static = random_obstacles(rng, 60, LARGE)
+    tiled = World(static, LARGE, LARGE)
+    exact = World(static, LARGE, LARGE, resolution=None)
+    assert isinstance(tiled.static_grid, TiledDistanceGrid)
+    assert isinstance(tiled.dynamic_grid, TiledDistanceGrid)
+    dynamic = random_obstacles(rng, 8, LARGE)
+    for obstacle in dynamic:
+        tiled.add_dynamic_obstacle(obstacle)
+        exact.add_dynamic_obstacle(obstacle)
+    for obstacle in dynamic[::2]:
+        tiled.remove_dynamic_obstacle(obstacle)
+        exact.remove_dynamic_obstacle(obstacle)
+
+    np_rng = np.random.default_rng(7)
+    points = np_rng.uniform(0, LARGE, (4000, 2))
+    # Points just outside obstacle boundaries, where the grids fall back to exact tests
+    for _, x, y, *size in static[:20] + dynamic:
+        points = np.vstack([points, np.column_stack([np_rng.uniform(x - 50, x + size[0] + 50, 100),
+                                                     np_rng.uniform(y - 50, y + size[-1] + 50, 100)])])
+    for clearance in (0, 10, STATIC_REACH - 1, STATIC_REACH, 2 * STATIC_REACH, 100):
+        expected = exact.in_obstacle_many(points, clearance)
+        assert (tiled.in_obstacle_many(points, clearance) == expected).all()
+        assert [tiled.in_obstacle(point, clearance) for point in points[:500].tolist()] == expected[:500].tolist()
+
+
+# Steps far longer than the clearance jump over thin walls unless edges are checked
+# against the static obstacles as segments
+def test_large_map_paths_miss_static_obstacles():
+    rng = random.Random(5)
+    walls = []
+    for _ in range(25):
+        x, y = rng.uniform(300, LARGE - 300), rng.uniform(300, LARGE - 300)
+        length = rng.uniform(300, 1500)
+        walls.append(("rect", x, y, 6, length) if rng.random() < 0.5 else ("rect", x, y, length, 6))
+    world = World(walls, LARGE, LARGE)
+    start, goal = (100, 100), (LARGE - 100, LARGE - 100)
+    for algorithm in ("mod_rrt_star", "dynamic_rrt", "extend_rrt_star", "bidirectional_mod_rrt_star"):
+        for seed in range(3):
+            result = plan(world, start, goal, budget=5000, algorithm=algorithm, seed=seed, step_size=200)
+            assert result.success
+            path = np.array(result.path)
+            assert not segments_intersect(path[:-1], path[1:], walls).any()
+            children, parents = result.nodes.edges()
+            assert not segments_intersect(children, parents, walls).any()
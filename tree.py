@@ -0,0 +1,359 @@
+import numpy as np
+
+from pareto import ParetoFront
+from spatial_index import KDTree
+
+INITIAL_CAPACITY = 1024
+# Above this many nodes, batched nearest-node lookups go through the k-d tree
+# instead of a dense samples x nodes distance matrix
+BRUTE_FORCE_LIMIT = 1024
+# Parent index of the root (and of nodes cut off from it)
+NO_PARENT = -1
+# Share of the slots that may be left empty by removed nodes before the tree is compacted
+COMPACT_SHARE = 0.25
+
+
+# Thin view of one node of a Tree. Reads and writes go straight to the tree's arrays,
+# so views are cheap to create and never go stale while the node exists.
+class Node:
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def point(self):
+        return self.tree.point(self.index)
+
+    @property
+    def parent(self):
+        parent = int(self.tree.parents[self.index])
+        return None if parent == NO_PARENT else Node(self.tree, parent)
+
+    @parent.setter
+    def parent(self, node):
+        self.tree.reparent(self.index, NO_PARENT if node is None else node.index)
+
+    @property
+    def cost(self):
+        return float(self.tree.costs[self.index])
+
+    @cost.setter
+    def cost(self, value):
+        self.tree.costs[self.index] = value
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self):
+        return "Node(%d, point=%r, cost=%.1f)" % (self.index, self.point, self.cost)
+
+
+# The RRT tree stored as a struct of arrays: node points, parent indices and costs
+# live in preallocated NumPy arrays that double when full. A k-d tree over the
+# points answers nearest and radius queries; both return node indices.
+# Children are kept as doubly linked sibling lists in three more arrays (first_child,
+# next_sibling, prev_sibling, with NO_PARENT for none), so a subtree can be walked in
+# time proportional to its size. Change parents through reparent() to keep them in step.
+# Removed nodes leave their slots empty (no parent, unlike the root, and out of the
+# k-d tree) until enough pile up for compact() to renumber the rest; len() counts the
+# slots, node_count() the nodes.
+class Tree:
+    def __init__(self, root_point, capacity=INITIAL_CAPACITY):
+        self.size = 0
+        self.points = np.empty((capacity, 2))
+        self.parents = np.empty(capacity, dtype=np.int64)
+        self.costs = np.empty(capacity)
+        self.first_child = np.empty(capacity, dtype=np.int64)
+        self.next_sibling = np.empty(capacity, dtype=np.int64)
+        self.prev_sibling = np.empty(capacity, dtype=np.int64)
+        self.index = KDTree()
+        self.front = None
+        # Bumped whenever existing nodes are renumbered, so observers holding
+        # indices know to start over
+        self.generation = 0
+        # Empty slots left by remove()
+        self.removed = 0
+        # Tree grown from the goal by the bidirectional planner, created on first use
+        self.goal_tree = None
+        # Goal-tree node index -> index of its copy here, for the branches grafted from
+        # the goal tree; only valid while grafted_key matches (see planner.graft)
+        self.grafted = {}
+        self.grafted_key = None
+        # Costs are arrival times, so edges are checked against moving obstacles at
+        # the times they would be traversed; not so in a goal tree, whose costs run
+        # back from the goal
+        self.timed = True
+        self.add(root_point)
+
+    def __len__(self):
+        return self.size
+
+    def node_count(self):
+        return self.size - self.removed
+
+    def __iter__(self):
+        if not self.removed:
+            return (Node(self, i) for i in range(self.size))
+        return (Node(self, i) for i in np.flatnonzero(self.alive()).tolist())
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError("node index out of range")
+        return Node(self, i)
+
+    @property
+    def root(self):
+        return Node(self, 0)
+
+    def point(self, i):
+        x, y = self.points[i].tolist()
+        return (x, y)
+
+    def grow(self, needed):
+        capacity = len(self.points)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("points", "parents", "costs", "first_child", "next_sibling", "prev_sibling"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    # Append a node and return its index
+    def add(self, point, parent=NO_PARENT, cost=0.0):
+        i = self.size
+        self.grow(i + 1)
+        self.points[i] = point
+        self.parents[i] = parent
+        self.costs[i] = cost
+        self.first_child[i] = NO_PARENT
+        self.link(i, parent)
+        self.size += 1
+        self.index.insert(point, i)
+        if self.front is not None:
+            self.front.insert(cost, self.front.goal_distance(point))
+        return i
+
+    # Append many nodes at once from arrays; returns their indices
+    def add_many(self, points, parents, costs):
+        start = self.size
+        count = len(points)
+        self.grow(start + count)
+        self.points[start:start + count] = points
+        self.parents[start:start + count] = parents
+        self.costs[start:start + count] = costs
+        self.first_child[start:start + count] = NO_PARENT
+        self.link_many(np.arange(start, start + count))
+        self.size += count
+        for i, point in enumerate(points.tolist(), start):
+            self.index.insert(point, i)
+        if self.front is not None:
+            for cost, point in zip(costs.tolist(), points.tolist()):
+                self.front.insert(cost, self.front.goal_distance(point))
+        return range(start, start + count)
+
+    # Put node i at the head of parent's children
+    def link(self, i, parent):
+        self.prev_sibling[i] = NO_PARENT
+        if parent == NO_PARENT:
+            self.next_sibling[i] = NO_PARENT
+            return
+        head = int(self.first_child[parent])
+        self.next_sibling[i] = head
+        if head != NO_PARENT:
+            self.prev_sibling[head] = i
+        self.first_child[parent] = i
+
+    # link() for many nodes at once; the nodes must not be linked yet
+    def link_many(self, indices):
+        self.next_sibling[indices] = NO_PARENT
+        self.prev_sibling[indices] = NO_PARENT
+        children = indices[self.parents[indices] != NO_PARENT]
+        # Group the children by parent; each group goes in front of the parent's
+        # current children, in index order
+        children = children[np.argsort(self.parents[children], kind="stable")]
+        if len(children) == 0:
+            return
+        groups = self.parents[children]
+        same = groups[1:] == groups[:-1]
+        heads = np.concatenate([[True], ~same])
+        tails = np.concatenate([~same, [True]])
+        self.next_sibling[children[:-1][same]] = children[1:][same]
+        self.prev_sibling[children[1:][same]] = children[:-1][same]
+        old_heads = self.first_child[groups[tails]]
+        self.next_sibling[children[tails]] = old_heads
+        linked = old_heads != NO_PARENT
+        self.prev_sibling[old_heads[linked]] = children[tails][linked]
+        self.first_child[groups[heads]] = children[heads]
+
+    # Take node i out of its parent's children
+    def unlink(self, i):
+        before = int(self.prev_sibling[i])
+        after = int(self.next_sibling[i])
+        if before != NO_PARENT:
+            self.next_sibling[before] = after
+        elif self.parents[i] != NO_PARENT:
+            self.first_child[self.parents[i]] = after
+        if after != NO_PARENT:
+            self.prev_sibling[after] = before
+
+    # Move node i (with its subtree) under parent; costs are left to the caller
+    def reparent(self, i, parent):
+        self.unlink(i)
+        self.parents[i] = parent
+        self.link(i, parent)
+
+    # Rebuild the sibling lists from the parents array, children in index order
+    def relink(self):
+        self.first_child[:self.size] = NO_PARENT
+        self.link_many(np.arange(self.size))
+
+    def children(self, i):
+        result = []
+        child = int(self.first_child[i])
+        while child != NO_PARENT:
+            result.append(child)
+            child = int(self.next_sibling[child])
+        return result
+
+    # Node indices of the subtree under i, i first
+    def subtree(self, i):
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        result = [i]
+        for j in result:
+            child = int(first_child[j])
+            while child != NO_PARENT:
+                result.append(child)
+                child = int(next_sibling[child])
+        return result
+
+    # Add delta to the cost of node i and all its descendants, e.g. after rewiring i.
+    # Cheaper nodes go into the dominance front (their old entries are dominated by the
+    # new ones); dearer ones leave it stale, so it is rebuilt on next use.
+    def shift_costs(self, i, delta):
+        subtree = self.subtree(i)
+        self.costs[subtree] += delta
+        if self.front is None:
+            return
+        if delta > 0:
+            self.front = None
+            return
+        for cost, point in zip(self.costs[subtree].tolist(), self.points[subtree].tolist()):
+            self.front.insert(cost, self.front.goal_distance(point))
+
+    # Times of traversing an edge between nodes of these costs, as the times argument of
+    # the World edge checks (scalars or arrays); None if costs are not arrival times
+    def edge_times(self, cost1, cost2):
+        return (cost1, cost2) if self.timed else None
+
+    # Pareto front of (cost, distance-to-goal) over the tree, built on first use
+    # and kept up to date by add(). Goal distances are computed once, on insertion.
+    def pareto_front(self, goal):
+        if self.front is None or self.front.goal != goal:
+            self.front = ParetoFront(goal)
+            alive = self.alive()
+            for cost, point in zip(self.costs[:self.size][alive].tolist(), self.points[:self.size][alive].tolist()):
+                self.front.insert(cost, self.front.goal_distance(point))
+        return self.front
+
+    def nearest(self, point):
+        return self.index.nearest(point)
+
+    # Index of the nearest node for each row of an (n, 2) array of points
+    def nearest_many(self, points):
+        if self.size > BRUTE_FORCE_LIMIT:
+            return np.array([self.index.nearest(point) for point in points.tolist()], dtype=np.int64)
+        diff = points[:, None, :] - self.points[None, :self.size, :]
+        distances = np.einsum("ijk,ijk->ij", diff, diff)
+        if self.removed:
+            distances[:, ~self.alive()] = np.inf
+        return distances.argmin(axis=1)
+
+    def near(self, point, radius):
+        return self.index.within(point, radius)
+
+    def k_nearest(self, point, k):
+        return self.index.k_nearest(point, k)
+
+    # Node indices from i back to the root
+    def path_indices(self, i):
+        return list(self.iter_path_indices(i))
+
+    # Lazy path_indices: each index is read only when it is asked for
+    def iter_path_indices(self, i):
+        while i != NO_PARENT:
+            yield i
+            i = int(self.parents[i])
+
+    # Points from node i back to the root, as an (n, 2) array
+    def path_points(self, i):
+        return self.points[self.path_indices(i)]
+
+    # Node indices of the subtree under each of roots (the root first), not descending
+    # into the nodes in stop
+    def subtrees(self, roots, stop=()):
+        stop = set(stop)
+        result = []
+        for root in roots:
+            subtree = [root]
+            for i in subtree:
+                subtree.extend(child for child in self.children(i) if child not in stop)
+            result.append(subtree)
+        return result
+
+    # Every edge of the tree as (child points, parent points) arrays
+    def edges(self):
+        children = np.flatnonzero(self.parents[:self.size] != NO_PARENT)
+        return self.points[children], self.points[self.parents[children]]
+
+    # Mask over the slots of the nodes that have not been removed
+    def alive(self):
+        mask = self.parents[:self.size] != NO_PARENT
+        mask[0] = True
+        return mask
+
+    # Remove nodes, which must come in whole subtrees (with every descendant of each).
+    # Only their own slots are touched, so the cost does not grow with the tree; once
+    # COMPACT_SHARE of the slots are empty the tree is compacted.
+    def remove(self, indices):
+        indices = [int(i) for i in indices]
+        for i in indices:
+            self.unlink(i)
+        for i in indices:
+            self.parents[i] = NO_PARENT
+            self.first_child[i] = NO_PARENT
+            self.index.remove(self.point(i), i)
+        self.removed += len(indices)
+        # Removed nodes may have been on the front
+        self.front = None
+        if self.removed > COMPACT_SHARE * self.size:
+            self.compact()
+
+    # Move the nodes into the leading slots, dropping the empty ones, and re-index them.
+    # Returns the old index -> new index map (NO_PARENT for empty slots).
+    def compact(self):
+        survivors = np.flatnonzero(self.alive())
+        remap = np.full(self.size, NO_PARENT, dtype=np.int64)
+        remap[survivors] = np.arange(len(survivors))
+        count = len(survivors)
+        self.points[:count] = self.points[survivors]
+        self.costs[:count] = self.costs[survivors]
+        old_parents = self.parents[survivors]
+        self.parents[:count] = np.where(old_parents == NO_PARENT, NO_PARENT, remap[np.maximum(old_parents, 0)])
+        self.size = count
+        self.removed = 0
+        self.relink()
+        self.index.rebuild(zip(self.points[:count].tolist(), range(count)))
+        self.front = None
+        self.generation += 1
+        return remap
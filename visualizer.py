@@ -0,0 +1,262 @@
+import numpy as np
+import pygame
+
+from planner import PlannerObserver
+from tree import NO_PARENT
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GREEN = (0, 255, 0)
+RED = (255, 0, 0)
+BLUE = (0, 255, 255)
+PURPLE = (128, 0, 128)
+YELLOW = (255, 165, 0)
+
+NODE_RADIUS = 5
+# Largest window opened for a world; larger worlds are drawn scaled down to fit
+MAX_DISPLAY_SIZE = (1200, 900)
+TRANSPARENT = (0, 0, 0, 0)
+# If more than this share of the drawn edges were rewired since the last frame,
+# Renderer redraws the tree layer instead of patching it
+FULL_REDRAW_SHARE = 0.25
+
+
+# Initialize Pygame; only called by the interactive front-ends
+def init_display(caption, size=(800, 600)):
+    pygame.init()
+    screen = pygame.display.set_mode(size)
+    pygame.display.set_caption(caption)
+    clock = pygame.time.Clock()
+    return screen, clock
+
+
+# World to screen factor for showing a world in at most MAX_DISPLAY_SIZE
+def display_scale(world):
+    return min(1.0, MAX_DISPLAY_SIZE[0] / world.width, MAX_DISPLAY_SIZE[1] / world.height)
+
+
+# Window size for a world, scaled by display_scale
+def display_size(world):
+    scale = display_scale(world)
+    return max(round(world.width * scale), 1), max(round(world.height * scale), 1)
+
+
+# The drawing functions take world coordinates and a world to screen scale factor;
+# sizes that would vanish at small scales are kept at one pixel
+def scaled(point, scale):
+    return (point[0] * scale, point[1] * scale)
+
+
+def draw_obstacle(screen, obs, color, scale=1.0):
+    if obs[0] == "circle":
+        _, x, y, r = obs
+        pygame.draw.circle(screen, color, (x * scale, y * scale), max(r * scale, 1))
+    elif obs[0] == "rect":
+        _, x, y, w, h = obs
+        pygame.draw.rect(screen, color, (x * scale, y * scale, max(w * scale, 1), max(h * scale, 1)))
+
+
+# Draw obstacles on the map
+def draw_map(screen, world, start=None, goal=None, scale=1.0):
+    screen.fill(WHITE)
+    if start is not None:
+        pygame.draw.circle(screen, RED, scaled(start, scale), NODE_RADIUS)
+    if goal is not None:
+        pygame.draw.circle(screen, RED, scaled(goal, scale), NODE_RADIUS)
+    for obs in world.static_obstacles:
+        draw_obstacle(screen, obs, BLACK, scale)
+    for obs in world.dynamic_obstacles:
+        draw_obstacle(screen, obs, PURPLE, scale)
+
+
+def draw_node(screen, node, scale=1.0):
+    x, y = scaled(node.point, scale)
+    if node.parent:
+        pygame.draw.line(screen, GREEN, (x, y), scaled(node.parent.point, scale), 2)
+    pygame.draw.circle(screen, BLUE, (int(x), int(y)), NODE_RADIUS)
+
+
+# Visualization
+def draw_tree(screen, nodes, scale=1.0):
+    children, parents = nodes.edges()
+    for child, parent in zip((children * scale).tolist(), (parents * scale).tolist()):
+        pygame.draw.line(screen, GREEN, child, parent, 2)
+    for x, y in (nodes.points[:len(nodes)][nodes.alive()] * scale).tolist():
+        pygame.draw.circle(screen, BLUE, (int(x), int(y)), NODE_RADIUS)
+
+
+# Draw a path (list or stream of points) with specified color
+def draw_path(screen, path, color, scale=1.0):
+    points = iter(path)
+    previous = next(points, None)
+    for point in points:
+        pygame.draw.line(screen, color, scaled(previous, scale), scaled(point, scale), 2)
+        previous = point
+
+
+# Incremental renderer for the interactive loop. The static map is drawn once onto a
+# background surface, dynamic obstacles onto their own layer when they change, and
+# the tree onto accumulating edge and node layers (edges sit under all nodes, as in
+# draw_tree): each frame only new nodes and rewired edges are drawn, instead of
+# redrawing the whole map and tree. Worlds larger than the screen are scaled to fit.
+# With a profiling.PlannerProfiler, render() is charged to its "draw" phase.
+class Renderer:
+    def __init__(self, screen, world, start=None, goal=None, profiler=None):
+        self.screen = screen
+        self.world = world
+        if profiler:
+            self.render = profiler.timed("draw", self.render)
+        size = screen.get_size()
+        self.scale = min(size[0] / world.width, size[1] / world.height)
+        self.background = pygame.Surface(size).convert()
+        self.background.fill(WHITE)
+        if start is not None:
+            pygame.draw.circle(self.background, RED, scaled(start, self.scale), NODE_RADIUS)
+        if goal is not None:
+            pygame.draw.circle(self.background, RED, scaled(goal, self.scale), NODE_RADIUS)
+        for obs in world.static_obstacles:
+            draw_obstacle(self.background, obs, BLACK, self.scale)
+        self.dynamic_layer = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        self.edge_layer = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        self.node_layer = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        # Repaints are drawn here unclipped and then copied over, so lines rasterize
+        # exactly as they do on a full redraw
+        self.scratch = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        self.drawn_obstacles = []
+        self.tree = None
+        self.generation = None
+        self.removed = 0
+        self.drawn = 0
+        self.drawn_parents = np.empty(0, dtype=np.int64)
+        self.max_edge = 0.0
+
+    def render(self, tree):
+        self.update_dynamic_layer()
+        self.update_tree_layers(tree)
+        self.screen.blit(self.background, (0, 0))
+        self.screen.blit(self.dynamic_layer, (0, 0))
+        self.screen.blit(self.edge_layer, (0, 0))
+        self.screen.blit(self.node_layer, (0, 0))
+
+    def update_dynamic_layer(self):
+        obstacles = self.world.dynamic_obstacles
+        if len(obstacles) < len(self.drawn_obstacles) or obstacles[:len(self.drawn_obstacles)] != self.drawn_obstacles:
+            # Something was removed or replaced: repaint the (small) layer
+            self.dynamic_layer.fill(TRANSPARENT)
+            self.drawn_obstacles = []
+        for obs in obstacles[len(self.drawn_obstacles):]:
+            draw_obstacle(self.dynamic_layer, obs, PURPLE, self.scale)
+        self.drawn_obstacles = list(obstacles)
+
+    def update_tree_layers(self, tree):
+        # Removed nodes leave no trace in the arrays to erase by, so start over
+        if (tree is not self.tree or tree.generation != self.generation or tree.removed != self.removed
+                or len(tree) < self.drawn):
+            self.tree = tree
+            self.generation = tree.generation
+            self.removed = tree.removed
+            self.redraw_tree()
+            return
+
+        rewired = np.flatnonzero(tree.parents[:self.drawn] != self.drawn_parents)
+        if len(rewired) > FULL_REDRAW_SHARE * self.drawn:
+            self.redraw_tree()
+            return
+        for child in rewired.tolist():
+            self.repaint_edges_around(child, int(self.drawn_parents[child]))
+
+        fresh = np.arange(self.drawn, len(tree))
+        self.draw_edges(self.edge_layer, np.concatenate([fresh, rewired]))
+        self.draw_nodes(self.node_layer, fresh)
+        self.snapshot()
+
+    def redraw_tree(self):
+        everything = np.flatnonzero(self.tree.alive())
+        self.edge_layer.fill(TRANSPARENT)
+        self.node_layer.fill(TRANSPARENT)
+        self.draw_edges(self.edge_layer, everything)
+        self.draw_nodes(self.node_layer, everything)
+        self.snapshot()
+
+    def snapshot(self):
+        self.drawn = len(self.tree)
+        self.drawn_parents = self.tree.parents[:self.drawn].copy()
+
+    # Draw the edges from the given nodes to their parents
+    def draw_edges(self, surface, indices):
+        tree = self.tree
+        children = indices[tree.parents[indices] != NO_PARENT]
+        if len(children) == 0:
+            return
+        # In screen coordinates, as is max_edge
+        child_points = tree.points[children] * self.scale
+        parent_points = tree.points[tree.parents[children]] * self.scale
+        self.max_edge = max(self.max_edge, float(np.hypot(*(child_points - parent_points).T).max()))
+        for child, parent in zip(child_points.tolist(), parent_points.tolist()):
+            pygame.draw.line(surface, GREEN, child, parent, 2)
+
+    def draw_nodes(self, surface, indices):
+        for x, y in (self.tree.points[indices] * self.scale).tolist():
+            pygame.draw.circle(surface, BLUE, (int(x), int(y)), NODE_RADIUS)
+
+    # Erase the old edge child -> old_parent and redraw whatever other edges overlapped it
+    def repaint_edges_around(self, child, old_parent):
+        tree = self.tree
+        if old_parent == NO_PARENT:
+            return
+        (x1, y1), (x2, y2) = scaled(tree.point(child), self.scale), scaled(tree.point(old_parent), self.scale)
+        margin = 3
+        region = pygame.Rect(int(min(x1, x2)) - margin, int(min(y1, y2)) - margin,
+                             int(abs(x2 - x1)) + 2 * margin + 1, int(abs(y2 - y1)) + 2 * margin + 1)
+        # blit() does not shift the destination when the source area is clipped
+        region = region.clip(self.edge_layer.get_rect())
+        # Any edge touching the region has an endpoint within this distance of its centre
+        reach = np.hypot(region.width, region.height) / 2 + self.max_edge + margin
+        centre = (region.centerx / self.scale, region.centery / self.scale)
+        nearby = np.array([i for i in tree.near(centre, reach / self.scale) if i < self.drawn], dtype=np.int64)
+        self.scratch.fill(TRANSPARENT, region)
+        self.draw_edges(self.scratch, nearby)
+        self.edge_layer.fill(TRANSPARENT, region)
+        self.edge_layer.blit(self.scratch, region, region)
+
+
+# Optional observer that shows a headless plan() run in a pygame window. Pass the run's
+# profiler to have the drawing (and any hold) charged to its "draw" phase rather than "other".
+class PygameObserver(PlannerObserver):
+    def __init__(self, world, start, goal, caption="MOD-RRT* Path Planning", hold=0, profiler=None):
+        self.world = world
+        self.start = start
+        self.goal = goal
+        self.hold = hold
+        if profiler:
+            for hook in ("tree_reset", "node_added", "path_improved", "path_found"):
+                setattr(self, hook, profiler.timed("draw", getattr(self, hook)))
+        self.scale = display_scale(world)
+        self.screen, self.clock = init_display(caption, display_size(world))
+
+    def tree_reset(self, nodes):
+        draw_map(self.screen, self.world, self.start, self.goal, self.scale)
+        draw_tree(self.screen, nodes, self.scale)
+        self.refresh()
+
+    def node_added(self, node):
+        draw_node(self.screen, node, self.scale)
+        self.refresh()
+
+    def path_improved(self, result):
+        # Show only the latest path: repaint the map and tree under it
+        draw_map(self.screen, self.world, self.start, self.goal, self.scale)
+        draw_tree(self.screen, result.nodes, self.scale)
+        draw_path(self.screen, result.path, YELLOW, self.scale)
+        self.refresh()
+
+    def path_found(self, result):
+        draw_path(self.screen, result.path, RED, self.scale)
+        self.refresh()
+        if self.hold:
+            pygame.time.wait(int(self.hold * 1000))
+
+    def refresh(self):
+        pygame.display.flip()
+        pygame.event.pump()
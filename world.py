@@ -0,0 +1,534 @@
+import math
+
+import numpy as np
+
+from collision_cache import CollisionCache
+from occupancy import DistanceGrid, TiledDistanceGrid, dense_fits, obstacle_bounds
+from spatial_index import ObstacleGrid
+
+# Obstacles are tagged tuples: ("rect", x, y, w, h) or ("circle", x, y, r)
+WIDTH = 800
+HEIGHT = 600
+RESOLUTION = 1.0
+# Dynamic obstacles are stamped only this far out, which keeps updates local
+DYNAMIC_REACH = 64
+# Maps too large for dense grids clamp static distances as well, so that only the tiles
+# near obstacles exist. Cells further out read as free for clearances below this; larger
+# clearances fall back to the exact check there, which is correct but slower.
+STATIC_REACH = 32
+# Below this many segments, per-segment checks beat the set-up cost of the NumPy kernels
+SCALAR_SEGMENT_LIMIT = 8
+
+
+# Calculate distance between two points
+def distance(point1, point2):
+    return math.sqrt((point1[0] - point2[0]) ** 2 + (point1[1] - point2[1]) ** 2)
+
+
+# Accept bare (x, y, w, h) rectangles as used by the map1 scripts
+def as_tagged(obstacle):
+    if isinstance(obstacle[0], str):
+        return tuple(obstacle)
+    return ("rect",) + tuple(obstacle)
+
+
+# Check if a circle and a rectangle overlap
+def circle_rect_overlap(circle, rect):
+    cx, cy, cr = circle
+    rx, ry, rw, rh = rect
+    closest_x = max(rx, min(cx, rx + rw))
+    closest_y = max(ry, min(cy, ry + rh))
+    distance_squared = (cx - closest_x)**2 + (cy - closest_y)**2
+    return distance_squared < cr**2
+
+
+# Bounding box (x0, y0, x1, y1) of a segment
+def segment_box(point1, point2):
+    return (min(point1[0], point2[0]), min(point1[1], point2[1]),
+            max(point1[0], point2[0]), max(point1[1], point2[1]))
+
+
+# Check if two rectangles overlap
+def rect_overlap(rect1, rect2):
+    x1, y1, w1, h1 = rect1
+    x2, y2, w2, h2 = rect2
+    return x1 < x2 + w2 and x1 + w1 > x2 and y1 < y2 + h2 and y1 + h1 > y2
+
+
+# Check if two circles overlap
+def circle_overlap(circle1, circle2):
+    x1, y1, r1 = circle1
+    x2, y2, r2 = circle2
+    return math.sqrt((x1 - x2)**2 + (y1 - y2)**2) < r1 + r2
+
+
+# Check if two tagged obstacles overlap
+def obstacles_overlap(obs1, obs2):
+    if obs1[0] == "circle" and obs2[0] == "circle":
+        return circle_overlap(obs1[1:], obs2[1:])
+    if obs1[0] == "rect" and obs2[0] == "rect":
+        return rect_overlap(obs1[1:], obs2[1:])
+    if obs1[0] == "circle":
+        return circle_rect_overlap(obs1[1:], obs2[1:])
+    return circle_rect_overlap(obs2[1:], obs1[1:])
+
+
+# Signed distance from a point to a single obstacle (negative inside)
+def obstacle_distance(point, obs):
+    x, y = point
+    if obs[0] == "circle":
+        _, ox, oy, r = obs
+        return distance((ox, oy), (x, y)) - r
+    _, ox, oy, w, h = obs
+    qx = abs(x - (ox + w / 2)) - w / 2
+    qy = abs(y - (oy + h / 2)) - h / 2
+    return math.hypot(max(qx, 0), max(qy, 0)) + min(max(qx, qy), 0)
+
+
+# Check if a point is within a clearance distance of a single obstacle
+def point_in_obstacle(point, obs, clearance=0):
+    return obstacle_distance(point, obs) <= clearance
+
+
+# Vectorized point_in_obstacle for an (n, 2) array of points
+def points_in_obstacle(points, obs, clearance=0):
+    x, y = points[:, 0], points[:, 1]
+    if obs[0] == "circle":
+        _, ox, oy, r = obs
+        return np.hypot(x - ox, y - oy) - r <= clearance
+    _, ox, oy, w, h = obs
+    qx = np.abs(x - (ox + w / 2)) - w / 2
+    qy = np.abs(y - (oy + h / 2)) - h / 2
+    return np.hypot(np.maximum(qx, 0), np.maximum(qy, 0)) + np.minimum(np.maximum(qx, qy), 0) <= clearance
+
+
+# Check a point against the obstacles of an ObstacleGrid that could be within clearance
+def index_blocked(index, point, clearance):
+    return any(point_in_obstacle(point, obs, clearance) for obs in index.point_candidates(point, clearance))
+
+
+# Check a point against one grid layer, falling back to the exact test near boundaries
+def layer_blocked(grid, index, point, clearance):
+    blocked = grid.blocked(point, clearance)
+    if blocked is None:
+        blocked = index_blocked(index, point, clearance)
+    return blocked
+
+
+# Vectorized layer_blocked for an (n, 2) array of points
+def layer_blocked_many(grid, index, points, clearance):
+    decided = grid.blocked_many(points, clearance)
+    blocked = decided == 1
+    for i in np.flatnonzero(decided < 0):
+        blocked[i] = index_blocked(index, points[i].tolist(), clearance)
+    return blocked
+
+
+def line_intersects_circle(point1, point2, center, radius):
+    x1, y1 = point1
+    x2, y2 = point2
+    cx, cy = center
+
+    # Vector from point1 to point2
+    dx, dy = x2 - x1, y2 - y1
+
+    # Vector from point1 to the circle's center
+    fx, fy = cx - x1, cy - y1
+
+    # Degenerate segment: just test the point
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        return distance(point1, center) <= radius
+
+    # Nearest point on the line to the circle center, clamped to the segment
+    t = (fx * dx + fy * dy) / length_squared
+    t = max(0, min(1, t))
+
+    nearest_x, nearest_y = x1 + t * dx, y1 + t * dy
+
+    return distance((nearest_x, nearest_y), center) <= radius
+
+
+# Check if a line segment intersects with a rectangle: clip the segment's parameter
+# range against the x and y slabs of the rectangle (Liang-Barsky); touching counts
+def line_intersects_rect(point1, point2, rect):
+    x1, y1 = point1
+    x2, y2 = point2
+    x, y, w, h = rect
+    t_enter, t_exit = 0.0, 1.0
+    for start, delta, low, high in ((x1, x2 - x1, x, x + w), (y1, y2 - y1, y, y + h)):
+        if delta == 0:
+            if not low <= start <= high:
+                return False
+            continue
+        t_low = (low - start) / delta
+        t_high = (high - start) / delta
+        if t_low > t_high:
+            t_low, t_high = t_high, t_low
+        t_enter = max(t_enter, t_low)
+        t_exit = min(t_exit, t_high)
+        if t_enter > t_exit:
+            return False
+    return True
+
+
+# Vectorized line_intersects_rect: segments point1s[i] - point2s[i] against rects[j]
+# given as an (m, 4) array of x, y, w, h. Returns an (n, m) boolean array. The points
+# may also be (n, m, 2) arrays, to test a different segment against each rect.
+def segments_intersect_rects(point1s, point2s, rects):
+    if point1s.ndim == 2:
+        point1s, point2s = point1s[:, None, :], point2s[:, None, :]
+    t_enter = np.zeros((len(point1s), len(rects)))
+    t_exit = np.ones((len(point1s), len(rects)))
+    hit = np.ones((len(point1s), len(rects)), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for axis in (0, 1):
+            start = point1s[..., axis]
+            delta = point2s[..., axis] - start
+            low = rects[:, axis]
+            high = low + rects[:, axis + 2]
+            t_low = (low - start) / delta
+            t_high = (high - start) / delta
+            # A segment parallel to the slab is either inside it all along or never
+            parallel = delta == 0
+            hit &= ~parallel | ((low <= start) & (start <= high))
+            t_enter = np.where(parallel, t_enter, np.maximum(t_enter, np.minimum(t_low, t_high)))
+            t_exit = np.where(parallel, t_exit, np.minimum(t_exit, np.maximum(t_low, t_high)))
+    return hit & (t_enter <= t_exit)
+
+
+# Vectorized line_intersects_circle: segments point1s[i] - point2s[i] against circles[j]
+# given as an (m, 3) array of x, y, r. Returns an (n, m) boolean array. As with
+# segments_intersect_rects, the points may also be (n, m, 2) arrays.
+def segments_intersect_circles(point1s, point2s, circles):
+    if point1s.ndim == 2:
+        point1s, point2s = point1s[:, None, :], point2s[:, None, :]
+    delta = point2s - point1s
+    length_squared = np.einsum("...k,...k->...", delta, delta)
+    fx = circles[:, 0] - point1s[..., 0]
+    fy = circles[:, 1] - point1s[..., 1]
+    # Nearest point to each centre, clamped to the segment (a degenerate segment is its start)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (fx * delta[..., 0] + fy * delta[..., 1]) / length_squared
+    t = np.where(length_squared > 0, np.clip(t, 0, 1), 0)
+    dx = fx - t * delta[..., 0]
+    dy = fy - t * delta[..., 1]
+    return np.hypot(dx, dy) <= circles[:, 2]
+
+
+# Distance grid for one obstacle layer: dense while the map fits in DENSE_CELL_LIMIT
+# cells, tiled beyond that. field is a precompiled field in the form the grid stores
+# (see occupancy.unpack_field).
+def layer_grid(width, height, resolution, max_distance, field=None):
+    if dense_fits(width, height, resolution):
+        return DistanceGrid(width, height, resolution, max_distance, field=field)
+    if not math.isfinite(max_distance):
+        max_distance = STATIC_REACH
+    return TiledDistanceGrid(width, height, resolution, max_distance, tiles=field)
+
+
+# Check n segments against a list of tagged obstacles at once; returns an (n,) boolean
+# array that is True where a segment hits any of them
+def segments_intersect(point1s, point2s, obstacles):
+    point1s, point2s = np.broadcast_arrays(np.asarray(point1s, dtype=float).reshape(-1, 2),
+                                           np.asarray(point2s, dtype=float).reshape(-1, 2))
+    hit = np.zeros(len(point1s), dtype=bool)
+    rects = np.array([obs[1:] for obs in obstacles if obs[0] == "rect"], dtype=float).reshape(-1, 4)
+    circles = np.array([obs[1:] for obs in obstacles if obs[0] == "circle"], dtype=float).reshape(-1, 3)
+    if len(rects):
+        hit |= segments_intersect_rects(point1s, point2s, rects).any(axis=1)
+    if len(circles):
+        hit |= segments_intersect_circles(point1s, point2s, circles).any(axis=1)
+    return hit
+
+
+# Space-time check against obstacles moving at constant velocities (an (m, 2) array):
+# the robot goes from point1s[i] at times1[i] to point2s[i] at times2[i]. Seen from
+# obstacle j that is again a straight segment, from point1 - v_j * time1 to
+# point2 - v_j * time2, so the static kernels can test it against where obstacle j is
+# at time 0. Returns the relative endpoints as two (n, m, 2) arrays; any of the inputs
+# may have a single row shared by all segments.
+def relative_segments(point1s, point2s, times1, times2, velocities):
+    return (point1s[:, None, :] - velocities[None, :, :] * times1[:, None, None],
+            point2s[:, None, :] - velocities[None, :, :] * times2[:, None, None])
+
+
+# Check if a line segment intersects with a single tagged obstacle
+def line_intersects(point1, point2, obs):
+    if obs[0] == "circle":
+        _, ox, oy, r = obs
+        return line_intersects_circle(point1, point2, (ox, oy), r)
+    _, ox, oy, w, h = obs
+    return line_intersects_rect(point1, point2, (ox, oy, w, h))
+
+
+# An obstacle moving at a constant velocity. shape is the tagged obstacle where it is
+# at time 0. Time is measured like path cost (the robot covers one map unit per unit
+# of time), so a node's cost is when the robot gets there and velocity is in map units
+# per map unit the robot travels.
+class MovingObstacle:
+    def __init__(self, shape, velocity):
+        self.shape = as_tagged(shape)
+        self.velocity = (float(velocity[0]), float(velocity[1]))
+
+    # The tagged obstacle where it is at time t
+    def at(self, t):
+        kind, x, y = self.shape[:3]
+        return (kind, x + self.velocity[0] * t, y + self.velocity[1] * t) + self.shape[3:]
+
+    def __repr__(self):
+        return "MovingObstacle(%r, velocity=%r)" % (self.shape, self.velocity)
+
+
+# The environment a planner runs in: map bounds, static and dynamic obstacles.
+# Holds no display state, so it can be used headless.
+# With a resolution set, the static map is compiled once into a signed distance
+# field and dynamic obstacles are stamped into a second, locally updated layer, so
+# in_obstacle is an array lookup for any clearance. resolution=None keeps the plain
+# per-obstacle checks. Exact checks go through ObstacleGrid broad phases (one static,
+# one dynamic), so they only test the obstacles near the point or segment. With
+# cache_size set, scalar point and segment results are memoized in a CollisionCache
+# of that many entries, which dynamic obstacle changes invalidate locally. It is off
+# by default: the planners rarely repeat a query, and a grid lookup is cheaper than a
+# cache lookup. The vectorized checks never go through it. static_field is the static
+# distance field precompiled for these obstacles and resolution (see map_cache.py),
+# which saves stamping them. Maps of any size work: beyond DENSE_CELL_LIMIT cells both
+# grids are tiled and only hold the tiles near obstacles.
+# Moving obstacles are kept apart, as arrays of their shapes at time 0 grown by the
+# clearance (rects first, then circles) and of their velocities; edge checks given
+# traversal times test them all at once in space-time.
+class World:
+    def __init__(self, static_obstacles, width=WIDTH, height=HEIGHT, clearance=10, resolution=RESOLUTION,
+                 dynamic_reach=DYNAMIC_REACH, cache_size=0, static_field=None):
+        self.width = width
+        self.height = height
+        self.clearance = clearance
+        self.static_obstacles = [as_tagged(obs) for obs in static_obstacles]
+        self.dynamic_obstacles = []
+        self.static_index = ObstacleGrid(self.static_obstacles)
+        self.dynamic_index = ObstacleGrid()
+        self.static_grid = None
+        self.dynamic_grid = None
+        if resolution:
+            self.static_grid = layer_grid(width, height, resolution, math.inf, static_field)
+            if static_field is None:
+                for obs in self.static_obstacles:
+                    self.static_grid.stamp(obs)
+            self.dynamic_grid = layer_grid(width, height, resolution, dynamic_reach)
+        self.cache = CollisionCache(cache_size) if cache_size else None
+        self.moving_obstacles = []
+        self.pack_moving_obstacles()
+
+    def add_dynamic_obstacle(self, obstacle):
+        obstacle = as_tagged(obstacle)
+        self.dynamic_obstacles.append(obstacle)
+        self.dynamic_index.insert(obstacle)
+        if self.dynamic_grid is not None:
+            self.dynamic_grid.stamp(obstacle)
+        if self.cache is not None:
+            self.cache.obstacle_changed(obstacle_bounds(obstacle), True)
+        return obstacle
+
+    def remove_dynamic_obstacle(self, obstacle):
+        obstacle = as_tagged(obstacle)
+        self.dynamic_obstacles.remove(obstacle)
+        self.dynamic_index.remove(obstacle)
+        if self.dynamic_grid is not None:
+            self.dynamic_grid.erase(obstacle, self.dynamic_obstacles)
+        if self.cache is not None:
+            self.cache.obstacle_changed(obstacle_bounds(obstacle), False)
+
+    def clear_dynamic_obstacles(self):
+        self.dynamic_obstacles = []
+        self.dynamic_index.clear()
+        if self.dynamic_grid is not None:
+            self.dynamic_grid.clear()
+        if self.cache is not None:
+            self.cache.clear()
+
+    def add_moving_obstacle(self, shape, velocity):
+        obstacle = MovingObstacle(shape, velocity)
+        self.moving_obstacles.append(obstacle)
+        self.pack_moving_obstacles()
+        return obstacle
+
+    def remove_moving_obstacle(self, obstacle):
+        self.moving_obstacles.remove(obstacle)
+        self.pack_moving_obstacles()
+
+    def clear_moving_obstacles(self):
+        self.moving_obstacles = []
+        self.pack_moving_obstacles()
+
+    # Rebuild the arrays the space-time kernels work on. Rects grow by the clearance on
+    # every side, which is slightly conservative at the corners.
+    def pack_moving_obstacles(self):
+        c = self.clearance
+        rects = [obs for obs in self.moving_obstacles if obs.shape[0] == "rect"]
+        circles = [obs for obs in self.moving_obstacles if obs.shape[0] == "circle"]
+        self.moving_rects = np.array([(x - c, y - c, w + 2 * c, h + 2 * c) for _, x, y, w, h in
+                                      (obs.shape for obs in rects)], dtype=float).reshape(-1, 4)
+        self.moving_circles = np.array([(x, y, r + c) for _, x, y, r in (obs.shape for obs in circles)],
+                                       dtype=float).reshape(-1, 3)
+        self.moving_velocities = np.array([obs.velocity for obs in rects + circles], dtype=float).reshape(-1, 2)
+        # Bounding boxes (x0, y0, x1, y1) at time 0, for the broad phase
+        x, y, w, h = self.moving_rects.T
+        cx, cy, r = self.moving_circles.T
+        self.moving_boxes = np.concatenate([np.column_stack([x, y, x + w, y + h]),
+                                            np.column_stack([cx - r, cy - r, cx + r, cy + r])])
+
+    # Check if an obstacle overlaps any obstacle already in the world
+    def overlaps_obstacle(self, obstacle):
+        obstacle = as_tagged(obstacle)
+        bounds = obstacle_bounds(obstacle)
+        return any(obstacles_overlap(obs, obstacle)
+                   for index in (self.static_index, self.dynamic_index)
+                   for obs in index.box_candidates(*bounds))
+
+    # Look key up in the cache, computing and storing the result on a miss. box bounds
+    # the region an obstacle must touch to change the result.
+    def memo(self, key, box, compute):
+        result = self.cache.get(key)
+        if result is None:
+            result = compute()
+            self.cache.put(key, result, box)
+        return result
+
+    # Check if a point is within a clearance distance of an obstacle
+    def in_obstacle(self, point, clearance=None):
+        if clearance is None:
+            clearance = self.clearance
+        if self.cache is None:
+            return self.point_blocked(point, clearance)
+        x, y = point
+        return self.memo(self.cache.point_key("point", point, clearance),
+                         (x - clearance, y - clearance, x + clearance, y + clearance),
+                         lambda: self.point_blocked(point, clearance))
+
+    def point_blocked(self, point, clearance):
+        if self.static_grid is not None:
+            if layer_blocked(self.static_grid, self.static_index, point, clearance):
+                return True
+            return bool(self.dynamic_obstacles) and layer_blocked(self.dynamic_grid, self.dynamic_index,
+                                                                 point, clearance)
+        return (index_blocked(self.static_index, point, clearance)
+                or index_blocked(self.dynamic_index, point, clearance))
+
+    # Vectorized in_obstacle for an (n, 2) array of points; returns a boolean array
+    def in_obstacle_many(self, points, clearance=None):
+        if clearance is None:
+            clearance = self.clearance
+        if self.static_grid is None:
+            return np.array([self.in_obstacle(point, clearance) for point in points.tolist()], dtype=bool)
+        blocked = layer_blocked_many(self.static_grid, self.static_index, points, clearance)
+        if self.dynamic_obstacles:
+            blocked |= layer_blocked_many(self.dynamic_grid, self.dynamic_index, points, clearance)
+        return blocked
+
+    # Check if the line segment between two points intersects with any dynamic obstacle.
+    # With times = (time1, time2), when the robot would be at either end, moving
+    # obstacles are checked too.
+    def intersects_dynamic_obstacle(self, point1, point2, times=None):
+        if times is not None and self.moving_obstacles:
+            if self.intersects_moving_obstacle_many(point1, point2, *times)[0]:
+                return True
+        if not self.dynamic_obstacles:
+            return False
+        if self.cache is None:
+            return self.index_hit(self.dynamic_index, point1, point2)
+        return self.memo(self.cache.segment_key("dynamic", point1, point2), segment_box(point1, point2),
+                         lambda: self.index_hit(self.dynamic_index, point1, point2))
+
+    # Check a segment against the obstacles of one index
+    def index_hit(self, index, point1, point2):
+        for obs in index.segment_candidates(point1, point2):
+            if line_intersects(point1, point2, obs):
+                return True
+        return False
+
+    # Vectorized intersects_dynamic_obstacle for segments point1s[i] - point2s[i] (point2s
+    # may also be a single point shared by all segments, and either time a scalar);
+    # returns a boolean array
+    def intersects_dynamic_obstacle_many(self, point1s, point2s, times=None):
+        hit = np.zeros(len(point1s), dtype=bool)
+        if self.dynamic_obstacles:
+            hit |= self.segments_hit(self.dynamic_index, point1s, point2s)
+        if times is not None and self.moving_obstacles:
+            hit |= self.intersects_moving_obstacle_many(point1s, point2s, *times)
+        return hit
+
+    # Space-time check of segments traversed from point1s[i] at times1[i] to point2s[i]
+    # at times2[i] against every moving obstacle; any argument may be shared by all
+    # segments. Returns a boolean array.
+    def intersects_moving_obstacle_many(self, point1s, point2s, times1, times2):
+        relative1, relative2 = relative_segments(
+            np.asarray(point1s, dtype=float).reshape(-1, 2), np.asarray(point2s, dtype=float).reshape(-1, 2),
+            np.asarray(times1, dtype=float).reshape(-1), np.asarray(times2, dtype=float).reshape(-1),
+            self.moving_velocities)
+        relative1, relative2 = np.broadcast_arrays(relative1, relative2)
+        if len(relative1) < SCALAR_SEGMENT_LIMIT:
+            # Broad phase for a few segments: most do not even reach an obstacle's
+            # bounding box. For larger batches most obstacles are near some segment.
+            boxes = self.moving_boxes
+            near = ((np.minimum(relative1, relative2) <= boxes[:, 2:]) &
+                    (np.maximum(relative1, relative2) >= boxes[:, :2])).all(axis=2)
+        else:
+            near = np.ones(relative1.shape[:2], dtype=bool)
+        rects = len(self.moving_rects)
+        if near[:, :rects].any():
+            near[:, :rects] &= segments_intersect_rects(relative1[:, :rects], relative2[:, :rects],
+                                                        self.moving_rects)
+        if near[:, rects:].any():
+            near[:, rects:] &= segments_intersect_circles(relative1[:, rects:], relative2[:, rects:],
+                                                          self.moving_circles)
+        return near.any(axis=1)
+
+    # Vectorized line_intersects_obstacle for segments point1s[i] - point2s[i] (either may
+    # also be a single point shared by all segments, and either time a scalar); returns
+    # a boolean array
+    def line_intersects_obstacle_many(self, point1s, point2s, times=None):
+        hit = (self.segments_hit(self.static_index, point1s, point2s)
+               | self.segments_hit(self.dynamic_index, point1s, point2s))
+        if times is not None and self.moving_obstacles:
+            hit |= self.intersects_moving_obstacle_many(point1s, point2s, *times)
+        return hit
+
+    # Test segments against the obstacles of one index that overlap their joint bounding box
+    def segments_hit(self, index, point1s, point2s):
+        point1s, point2s = np.broadcast_arrays(np.asarray(point1s, dtype=float).reshape(-1, 2),
+                                               np.asarray(point2s, dtype=float).reshape(-1, 2))
+        if len(point1s) == 0 or len(index) == 0:
+            return np.zeros(len(point1s), dtype=bool)
+        if len(point1s) < SCALAR_SEGMENT_LIMIT:
+            return np.array([self.index_hit(index, point1, point2)
+                             for point1, point2 in zip(point1s.tolist(), point2s.tolist())], dtype=bool)
+        low = np.minimum(point1s.min(axis=0), point2s.min(axis=0))
+        high = np.maximum(point1s.max(axis=0), point2s.max(axis=0))
+        return segments_intersect(point1s, point2s, index.box_candidates(low[0], low[1], high[0], high[1]))
+
+    # Check if a line segment between two points intersects with any obstacle, static or
+    # dynamic. This is the check for tree edges: their ends are clear of the obstacles,
+    # but an edge longer than the clearance can still cut across a corner or a thin wall.
+    # With times = (time1, time2), as for intersects_dynamic_obstacle, moving obstacles
+    # are checked too.
+    def line_intersects_obstacle(self, point1, point2, times=None):
+        if times is not None and self.moving_obstacles:
+            if self.intersects_moving_obstacle_many(point1, point2, *times)[0]:
+                return True
+        if self.cache is None:
+            return self.segment_blocked(point1, point2)
+        return self.memo(self.cache.segment_key("line", point1, point2), segment_box(point1, point2),
+                         lambda: self.segment_blocked(point1, point2))
+
+    def segment_blocked(self, point1, point2):
+        return self.index_hit(self.static_index, point1, point2) or self.index_hit(self.dynamic_index, point1, point2)
+
+    def sample_point(self, rng):
+        return (rng.randint(0, self.width), rng.randint(0, self.height))
+
+    # Draw count points at once from a numpy Generator, as an (count, 2) float array
+    def sample_points(self, np_rng, count):
+        points = np.empty((count, 2))
+        points[:, 0] = np_rng.integers(0, self.width, count, endpoint=True)
+        points[:, 1] = np_rng.integers(0, self.height, count, endpoint=True)
+        return points